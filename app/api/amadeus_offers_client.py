@@ -1,39 +1,125 @@
+import threading
+import time
 import requests
-from app.config.settings import AMADEUS_BASE_URL, AMADEUS_API_KEY, AMADEUS_API_SECRET
+from requests.adapters import HTTPAdapter
+from app.api.rate_limit import TokenBucket
+from app.config.settings import (
+    AMADEUS_BASE_URL,
+    AMADEUS_API_KEY,
+    AMADEUS_API_SECRET,
+    AMADEUS_RATE_PER_S,
+    AMADEUS_MAX_RETRIES_429,
+)
+
+# odśwież token tyle sekund przed końcem expires_in
+TOKEN_REFRESH_MARGIN_S = 60
+
+class AmadeusClient:
+    """
+    Klient Amadeus: token OAuth trzymany do (expires_in - margines),
+    odświeżany pod lockiem (bezpieczne dla wątków), jedna sesja keep-alive.
+    rate_limiter: opcjonalny TokenBucket - każde zapytanie czeka na token,
+    a 429 zwalnia tempo i powtarza zapytanie (do max_retries_429 razy).
+    """
+
+    def __init__(self, base_url: str = AMADEUS_BASE_URL, api_key: str = AMADEUS_API_KEY,
+                 api_secret: str = AMADEUS_API_SECRET, pool_size: int = 10,
+                 rate_limiter: TokenBucket | None = None, max_retries_429: int = AMADEUS_MAX_RETRIES_429):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._token = None
+        self._token_expires = 0.0
+        self._lock = threading.Lock()
+        self.rate_limiter = rate_limiter
+        self.max_retries_429 = max_retries_429
+
+    def get_token(self, force: bool = False) -> str:
+        with self._lock:
+            if not force and self._token and time.monotonic() < self._token_expires:
+                return self._token
+
+            if not self.api_key or not self.api_secret:
+                raise RuntimeError("Missing AMADEUS_API_KEY / AMADEUS_API_SECRET")
+
+            r = self.session.post(
+                f"{self.base_url}/v1/security/oauth2/token",
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.api_key,
+                    "client_secret": self.api_secret
+                },
+                timeout=20
+            )
+            if r.status_code >= 400:
+                raise RuntimeError(f"Amadeus token HTTP {r.status_code}: {r.text[:1200]}")
+            data = r.json()
+            expires_in = float(data.get("expires_in", 1799))
+            self._token = data["access_token"]
+            self._token_expires = time.monotonic() + max(0.0, expires_in - TOKEN_REFRESH_MARGIN_S)
+            return self._token
+
+    def search_offers(self, origin: str, dest: str, depart_date: str, adults: int = 1, max_results: int = 20):
+        params = {
+            "originLocationCode": origin,
+            "destinationLocationCode": dest,
+            "departureDate": depart_date,
+            "adults": adults,
+            "max": max_results
+        }
+        r = self._get("/v2/shopping/flight-offers", params)
+        if r.status_code == 401:
+            # token unieważniony po stronie Amadeus przed czasem - jedna ponowna próba
+            self.get_token(force=True)
+            r = self._get("/v2/shopping/flight-offers", params)
+        if r.status_code >= 400:
+            raise RuntimeError(f"Amadeus HTTP {r.status_code}: {r.text[:1200]}")
+        return r.json().get("data", [])
+
+    def _get(self, path: str, params: dict):
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            headers = {"Authorization": f"Bearer {self.get_token()}"}
+            r = self.session.get(
+                f"{self.base_url}{path}",
+                headers=headers,
+                params=params,
+                timeout=30
+            )
+            if self.rate_limiter is None:
+                return r
+            if r.status_code != 429:
+                self.rate_limiter.on_success()
+                return r
+            self.rate_limiter.on_throttle(_retry_after(r))
+            attempt += 1
+            if attempt > self.max_retries_429:
+                return r
+
+def _retry_after(r) -> float | None:
+    try:
+        return float(r.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> AmadeusClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AmadeusClient(rate_limiter=TokenBucket(AMADEUS_RATE_PER_S))
+        return _client
 
 def get_token() -> str:
-    if not AMADEUS_API_KEY or not AMADEUS_API_SECRET:
-        raise RuntimeError("Missing AMADEUS_API_KEY / AMADEUS_API_SECRET")
-
-    r = requests.post(
-        f"{AMADEUS_BASE_URL}/v1/security/oauth2/token",
-        data={
-            "grant_type": "client_credentials",
-            "client_id": AMADEUS_API_KEY,
-            "client_secret": AMADEUS_API_SECRET
-        },
-        timeout=20
-    )
-    if r.status_code >= 400:
-        raise RuntimeError(f"Amadeus token HTTP {r.status_code}: {r.text[:1200]}")
-    return r.json()["access_token"]
+    return get_client().get_token()
 
 def search_offers(origin: str, dest: str, depart_date: str, adults: int = 1, max_results: int = 20):
-    token = get_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {
-        "originLocationCode": origin,
-        "destinationLocationCode": dest,
-        "departureDate": depart_date,
-        "adults": adults,
-        "max": max_results
-    }
-    r = requests.get(
-        f"{AMADEUS_BASE_URL}/v2/shopping/flight-offers",
-        headers=headers,
-        params=params,
-        timeout=30
-    )
-    if r.status_code >= 400:
-        raise RuntimeError(f"Amadeus HTTP {r.status_code}: {r.text[:1200]}")
-    return r.json().get("data", [])
+    return get_client().search_offers(origin, dest, depart_date, adults=adults, max_results=max_results)
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from datetime import datetime, date, timedelta
 import hashlib
 import random
+import numpy as np
 
 @dataclass
 class HourlyWeatherRow:
@@ -12,6 +13,77 @@ class HourlyWeatherRow:
     precipitation_mm: float
     visibility_m: float
 
+class HourlyWeatherBatch:
+    """
+    Kolumnowa paczka danych godzinowych jednego lotniska - zamiast obiektu per godzinę.
+    Kolumny to listy (prosto z JSON Open-Meteo) albo tablice NumPy (generator syntetyczny).
+    dt_utc: lista datetime albo tablica datetime64 - po to_params zawsze datetime,
+    więc ta sama godzina z API i z generatora ma ten sam klucz (SQLite porównuje tekst).
+    """
+    __slots__ = ("dt_utc", "temperature_c", "windspeed_ms", "precipitation_mm", "visibility_m")
+
+    def __init__(self, dt_utc, temperature_c, windspeed_ms, precipitation_mm, visibility_m):
+        self.dt_utc = dt_utc
+        self.temperature_c = temperature_c
+        self.windspeed_ms = windspeed_ms
+        self.precipitation_mm = precipitation_mm
+        self.visibility_m = visibility_m
+
+    def __len__(self) -> int:
+        return len(self.dt_utc)
+
+    @classmethod
+    def from_open_meteo(cls, data: dict) -> HourlyWeatherBatch:
+        """
+        Odpowiedź Open-Meteo (jedna lokalizacja) -> batch; brakujące końcówki kolumn = None.
+        Czas 'YYYY-MM-DDTHH:MM' -> datetime (nie napis - inny format niż wiersze syntetyczne).
+        """
+        h = (data or {}).get("hourly") or {}
+        times = h.get("time") or []
+        n = len(times)
+
+        def col(name):
+            values = h.get(name) or []
+            return values[:n] + [None] * (n - len(values))
+
+        return cls(
+            [datetime.fromisoformat(t) for t in times],
+            col("temperature_2m"),
+            col("wind_speed_10m"),
+            col("precipitation"),
+            col("visibility"),
+        )
+
+    @classmethod
+    def from_rows(cls, rows) -> HourlyWeatherBatch:
+        """
+        Lista HourlyWeatherRow (stary format) -> batch.
+        """
+        rows = list(rows)
+        return cls(
+            [r.dt_utc for r in rows],
+            [r.temperature_c for r in rows],
+            [r.windspeed_ms for r in rows],
+            [r.precipitation_mm for r in rows],
+            [r.visibility_m for r in rows],
+        )
+
+    def to_params(self, iata_code: str, source, synthetic: bool = False):
+        """
+        Krotki (iata, dt, t, w, p, v, source, is_synthetic) gotowe do executemany.
+        source: jedna wartość dla całej paczki albo lista per godzina.
+        """
+        dt = self.dt_utc
+        if isinstance(dt, np.ndarray):
+            dt = dt.astype("datetime64[s]").astype(object)
+        cols = [
+            c.tolist() if isinstance(c, np.ndarray) else c
+            for c in (self.temperature_c, self.windspeed_ms, self.precipitation_mm, self.visibility_m)
+        ]
+        n = len(self)
+        sources = [source] * n if isinstance(source, str) else source
+        return list(zip([iata_code] * n, dt, *cols, sources, [int(synthetic)] * n))
+
 def _stable_seed(*parts: str) -> int:
     s = "|".join(parts).encode("utf-8")
     h = hashlib.sha256(s).hexdigest()
@@ -75,18 +147,98 @@ def generate_synthetic_hourly_weather(
         cur += timedelta(hours=1)
 
     return rows
+
+def generate_synthetic_hourly_columns(
+    iata_code: str,
+    start_date: date,
+    end_date: date,
+) -> HourlyWeatherBatch:
+    """
+    Wektorowa wersja generate_synthetic_hourly_weather: cały zakres jako kolumny NumPy.
+    Ten sam seed i te same parametry bazowe (iata+zakres), ten sam kształt rozkładów.
+    """
+    seed = _stable_seed(iata_code, start_date.isoformat(), end_date.isoformat())
+    base = random.Random(seed)
+    base_temp = base.uniform(2.0, 18.0)
+    temp_amp = base.uniform(4.0, 10.0)
+    base_wind = base.uniform(1.5, 7.0)
+    rain_chance = base.uniform(0.05, 0.35)
+
+    n = max(0, (end_date - start_date).days + 1) * 24
+    dt_utc = np.datetime64(start_date.isoformat(), "h") + np.arange(n)
+    hour = np.arange(n) % 24
+
+    rng = np.random.default_rng(seed)
+    # po 14:00 chłodniej o amplitudę - ta sama asymetria co w wersji pętlowej
+    temp = base_temp - temp_amp * (hour > 14) + rng.uniform(-1.2, 1.2, n)
+    wind = np.maximum(0.0, base_wind + rng.uniform(-2.0, 4.0, n))
+    precip = np.where(rng.random(n) < rain_chance, rng.uniform(0.1, 6.0, n), 0.0)
+    visibility = (
+        20000.0
+        - precip * rng.uniform(800, 2500, n)
+        - np.maximum(0.0, wind - 8.0) * rng.uniform(300, 1200, n)
+    )
+    visibility = np.clip(visibility, 800.0, 20000.0)
+
+    return HourlyWeatherBatch(dt_utc, temp, wind, precip, visibility)
 import requests
+from requests.adapters import HTTPAdapter
+from app.api.response_cache import ResponseCache
+from app.config.settings import (
+    OPEN_METEO_CACHE_ENABLED,
+    OPEN_METEO_CACHE_PATH,
+    OPEN_METEO_CACHE_MAX_MB,
+    OPEN_METEO_FORECAST_TTL_S,
+)
 
 ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
 FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
 
 HOURLY = "temperature_2m,wind_speed_10m,precipitation,visibility"
 
-def fetch_hourly(lat: float, lon: float, start_date: str, end_date: str, mode: str):
+# Archiwum dla ostatnich dni bywa jeszcze uzupełniane - takie zakresy
+# traktujemy jak prognozę (TTL), starsze nie wygasają nigdy.
+ARCHIVE_SETTLE_DAYS = 7
+
+_cache = None
+
+def get_cache() -> ResponseCache | None:
+    global _cache
+    if _cache is None and OPEN_METEO_CACHE_ENABLED:
+        _cache = ResponseCache(OPEN_METEO_CACHE_PATH, max_bytes=OPEN_METEO_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
+
+def _cache_key(base: str, lat: float, lon: float, start_date: str, end_date: str) -> str:
+    return ResponseCache.make_key(base, f"{float(lat):.4f}", f"{float(lon):.4f}", start_date, end_date, HOURLY)
+
+def _cache_ttl(mode: str, end_date: str) -> float | None:
+    if mode == "historical" and date.fromisoformat(end_date) < date.today() - timedelta(days=ARCHIVE_SETTLE_DAYS):
+        return None
+    return OPEN_METEO_FORECAST_TTL_S
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """
+    Współdzielona sesja HTTP (keep-alive) z pulą połączeń dla równoległych pobrań.
+    """
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+def fetch_hourly(lat: float, lon: float, start_date: str, end_date: str, mode: str, session: requests.Session | None = None):
     """
     mode: 'historical' uses ARCHIVE_URL, 'forecast' uses FORECAST_URL
+    session: opcjonalna współdzielona sesja (make_session)
     """
     base = ARCHIVE_URL if mode == "historical" else FORECAST_URL
+    cache = get_cache()
+    key = _cache_key(base, lat, lon, start_date, end_date)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
     params = {
         "latitude": lat,
         "longitude": lon,
@@ -95,7 +247,65 @@ def fetch_hourly(lat: float, lon: float, start_date: str, end_date: str, mode: s
         "end_date": end_date,
         "timezone": "UTC"
     }
-    r = requests.get(base, params=params, timeout=30)
+    r = (session or requests).get(base, params=params, timeout=30)
     if r.status_code >= 400:
         raise RuntimeError(f"Open-Meteo {mode} HTTP {r.status_code}: {r.text[:800]}")
-    return r.json()
\ No newline at end of file
+    data = r.json()
+    if cache is not None:
+        cache.put(key, data, ttl=_cache_ttl(mode, end_date))
+    return data
+
+# Open-Meteo przyjmuje listy współrzędnych rozdzielone przecinkami i zwraca
+# listę odpowiedzi (po jednej na lokalizację, w tej samej kolejności).
+# Limit lokalizacji na wywołanie trzyma URL i "wagę" zapytania w granicach API.
+MAX_LOCATIONS_PER_CALL = 50
+
+def fetch_hourly_many(
+    locations: list[tuple[str, float, float]],
+    start_date: str,
+    end_date: str,
+    mode: str,
+    session: requests.Session | None = None,
+    max_locations: int = MAX_LOCATIONS_PER_CALL,
+) -> dict[str, dict]:
+    """
+    locations: lista (iata, lat, lon)
+    Zwraca {iata: odpowiedź jak z fetch_hourly}. Jedno wywołanie HTTP na
+    max_locations lotnisk; błąd HTTP przerywa całą paczkę (RuntimeError).
+    Lokalizacje obecne w cache nie trafiają do zapytania.
+    """
+    base = ARCHIVE_URL if mode == "historical" else FORECAST_URL
+    cache = get_cache()
+    ttl = _cache_ttl(mode, end_date)
+    out: dict[str, dict] = {}
+    missing = []
+    for loc in locations:
+        hit = cache.get(_cache_key(base, loc[1], loc[2], start_date, end_date)) if cache is not None else None
+        if hit is not None:
+            out[loc[0]] = hit
+        else:
+            missing.append(loc)
+
+    for i in range(0, len(missing), max(1, max_locations)):
+        part = missing[i:i + max_locations]
+        params = {
+            "latitude": ",".join(str(lat) for _iata, lat, _lon in part),
+            "longitude": ",".join(str(lon) for _iata, _lat, lon in part),
+            "hourly": HOURLY,
+            "start_date": start_date,
+            "end_date": end_date,
+            "timezone": "UTC"
+        }
+        r = (session or requests).get(base, params=params, timeout=30 + 5 * len(part))
+        if r.status_code >= 400:
+            raise RuntimeError(f"Open-Meteo {mode} HTTP {r.status_code}: {r.text[:800]}")
+        data = r.json()
+        # pojedyncza lokalizacja -> obiekt, wiele -> lista
+        items = data if isinstance(data, list) else [data]
+        if len(items) != len(part):
+            raise RuntimeError(f"Open-Meteo {mode}: expected {len(part)} locations, got {len(items)}")
+        for (iata, lat, lon), item in zip(part, items):
+            out[iata] = item
+            if cache is not None:
+                cache.put(_cache_key(base, lat, lon, start_date, end_date), item, ttl=ttl)
+    return out
@@ -0,0 +1,48 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Token bucket dla limitów API (np. Amadeus: N zapytań/s).
+    Adaptacyjny: po 429 (on_throttle) tempo spada o połowę i wszyscy czekają
+    retry_after sekund; kolejne udane zapytania (on_success) stopniowo
+    przywracają tempo do wartości docelowej.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = 0.2):
+        self.target_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.target_rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = max(self._paused_until - now, (1.0 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, now + (retry_after or 1.0 / self.rate))
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate < self.target_rate:
+                self.rate = min(self.target_rate, self.rate + 0.1 * self.target_rate)
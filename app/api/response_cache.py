@@ -0,0 +1,108 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+class ResponseCache:
+    """
+    Lokalny cache odpowiedzi HTTP (JSON) w pliku SQLite.
+    - wartości skompresowane zlib,
+    - ttl=None -> wpis nie wygasa (np. archiwum Open-Meteo),
+    - łączny rozmiar ograniczony do max_bytes, usuwanie LRU (last_access).
+    Bezpieczny dla wątków: osobne połączenie per operacja + lock na zapisach.
+    Łączny rozmiar liczony w pamięci przy każdym put; pełne sprzątanie (wygasłe
+    wpisy + SUM(size) od nowa, np. po zapisach innego procesu) co EVICT_EVERY
+    zapisów albo po przekroczeniu max_bytes.
+    """
+
+    EVICT_EVERY = 100
+
+    def __init__(self, path: str | Path, max_bytes: int = 500 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: int | None = None  # suma size; None = jeszcze nie policzona
+        self._puts = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                  key TEXT PRIMARY KEY,
+                  body BLOB NOT NULL,
+                  size INTEGER NOT NULL,
+                  created_at REAL NOT NULL,
+                  expires_at REAL NULL,
+                  last_access REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses(last_access)")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        s = "|".join(str(p) for p in parts).encode("utf-8")
+        return hashlib.sha256(s).hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT body, expires_at FROM responses WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            body, expires_at = row
+            if expires_at is not None and expires_at < now:
+                return None
+            db.execute("UPDATE responses SET last_access=? WHERE key=?", (now, key))
+        return json.loads(zlib.decompress(body))
+
+    def put(self, key: str, value, ttl: float | None = None) -> None:
+        now = time.time()
+        body = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        expires_at = None if ttl is None else now + ttl
+        with self._lock, self._connect() as db:
+            if self._total is None:
+                self._total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            old = db.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+            db.execute("""
+                INSERT INTO responses (key, body, size, created_at, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                  body=excluded.body, size=excluded.size, created_at=excluded.created_at,
+                  expires_at=excluded.expires_at, last_access=excluded.last_access
+            """, (key, body, len(body), now, expires_at, now))
+            self._total += len(body) - (old[0] if old else 0)
+            self._puts += 1
+            if self._total > self.max_bytes or self._puts % self.EVICT_EVERY == 0:
+                self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+                db.execute("DELETE FROM responses WHERE key=?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._total = total
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM responses")
+            self._total = 0
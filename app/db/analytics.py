@@ -0,0 +1,44 @@
+import re
+import pandas as pd
+from sqlalchemy import text
+from app.db.connection import get_read_engine
+from app.config.settings import (
+    DB_BACKEND, DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_SQLITE_PATH, DB_USER, REPORT_BACKEND,
+)
+
+# Zapytania raportów (GROUP BY / ORDER BY po dużych tabelach).
+# REPORT_BACKEND=sql    - przez engine odczytów (get_read_engine: MySQL / replika / SQLite),
+# REPORT_BACKEND=duckdb - kolumnowy DuckDB z bazą aplikacji podpiętą READ_ONLY (ATTACH).
+NAMED_PARAM_RE = re.compile(r"(?<![:\w]):(\w+)")
+
+def _duckdb_connect():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise RuntimeError("REPORT_BACKEND=duckdb wymaga pakietu duckdb (pip install duckdb)") from e
+
+    con = duckdb.connect()
+    if DB_BACKEND == "sqlite":
+        con.execute("INSTALL sqlite; LOAD sqlite;")
+        con.execute(f"ATTACH '{DB_SQLITE_PATH}' AS app (TYPE sqlite, READ_ONLY)")
+    else:
+        con.execute("INSTALL mysql; LOAD mysql;")
+        dsn = f"host={DB_HOST} port={DB_PORT} user={DB_USER} password={DB_PASSWORD} database={DB_NAME}"
+        con.execute(f"ATTACH '{dsn}' AS app (TYPE mysql, READ_ONLY)")
+    con.execute("USE app")
+    return con
+
+def read_df(sql: str, params: dict | None = None) -> pd.DataFrame:
+    """
+    Wynik zapytania jako DataFrame; parametry w stylu :nazwa jak w text().
+    """
+    params = params or {}
+    if REPORT_BACKEND == "duckdb":
+        con = _duckdb_connect()
+        try:
+            return con.execute(NAMED_PARAM_RE.sub(r"$\1", sql), params).df()
+        finally:
+            con.close()
+
+    with get_read_engine().connect() as conn:
+        return pd.read_sql(text(sql), conn, params=params)
@@ -1,11 +1,112 @@
-from sqlalchemy import create_engine
-from app.config.settings import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+import sqlite3
+import threading
+from pathlib import Path
+from sqlalchemy import create_engine, event
+from app.config.settings import (
+    DB_BACKEND, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_SQLITE_PATH, SQL_METRICS_ENABLED,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_S, DB_POOL_TIMEOUT_S, DB_CONNECT_TIMEOUT_S,
+    DB_READ_TIMEOUT_S, DB_READ_URL, DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW,
+)
+from app.db import metrics
 
+SQLITE_SCHEMA = Path(__file__).resolve().parents[2] / "sql" / "sqlite" / "schema.sql"
+
+# Dwa engine'y z osobnymi pulami:
+#   get_engine()      - ETL (zapisy, krótkie transakcje),
+#   get_read_engine() - raporty i statystyki (długie odczyty; opcjonalnie replika DB_READ_URL),
+# więc skany raportów nie zajmują połączeń potrzebnych ETL i odwrotnie.
 _engine = None
+_read_engine = None
+_lock = threading.Lock()
 
 def get_engine():
     global _engine
     if _engine is None:
-        url = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
-        _engine = create_engine(url, pool_pre_ping=True, future=True)
+        with _lock:
+            if _engine is None:
+                _engine = _create(read_only=False)
     return _engine
+
+def get_read_engine():
+    global _read_engine
+    if _read_engine is None:
+        with _lock:
+            if _read_engine is None:
+                _read_engine = _create(read_only=True)
+    return _read_engine
+
+def _create(read_only: bool):
+    pool = {
+        "pool_size": DB_READ_POOL_SIZE if read_only else DB_POOL_SIZE,
+        "max_overflow": DB_READ_MAX_OVERFLOW if read_only else DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE_S,
+        "pool_timeout": DB_POOL_TIMEOUT_S,
+    }
+    if read_only and DB_READ_URL:
+        engine = create_engine(DB_READ_URL, pool_pre_ping=True, future=True, **pool)
+    elif DB_BACKEND == "sqlite":
+        engine = _sqlite_engine(DB_SQLITE_PATH, read_only, pool)
+    elif DB_BACKEND == "mysql":
+        url = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+        connect_args = {"connect_timeout": DB_CONNECT_TIMEOUT_S}
+        if DB_READ_TIMEOUT_S:
+            connect_args["read_timeout"] = DB_READ_TIMEOUT_S
+        engine = create_engine(url, pool_pre_ping=True, future=True, connect_args=connect_args, **pool)
+    else:
+        raise ValueError(f"Unsupported DB_BACKEND: {DB_BACKEND} (expected mysql or sqlite)")
+
+    if read_only and engine.dialect.name in ("mysql", "mariadb"):
+        @event.listens_for(engine, "connect")
+        def _read_only_session(dbapi_conn, _record):
+            # przypadkowy zapis przez engine raportów kończy się błędem zamiast zmianą danych
+            cur = dbapi_conn.cursor()
+            cur.execute("SET SESSION TRANSACTION READ ONLY")
+            cur.close()
+
+    if SQL_METRICS_ENABLED:
+        metrics.install(engine)
+    return engine
+
+def init_sqlite_schema(path: str) -> None:
+    """
+    Tworzy tabele z sql/sqlite/schema.sql, jeśli plik bazy ich nie ma.
+    """
+    with sqlite3.connect(path) as raw:
+        exists = raw.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='airports'").fetchone()
+        if not exists:
+            raw.executescript(SQLITE_SCHEMA.read_text(encoding="utf-8"))
+    raw.close()
+
+def _sqlite_engine(path: str, read_only: bool, pool: dict):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    init_sqlite_schema(path)
+
+    # ETL pisze z kilku wątków (WEATHER_DB_WORKERS) - połączenia z puli przechodzą między wątkami,
+    # a timeout czeka na blokadę zapisu zamiast od razu zwracać "database is locked"
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        future=True,
+        **pool,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        # BEGIN wysyłamy sami (niżej) - sterownik nie otwiera transakcji po swojemu
+        dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA foreign_keys=ON")
+        cur.execute("PRAGMA journal_mode=WAL")
+        if read_only:
+            cur.execute("PRAGMA query_only=ON")
+        cur.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        # IMMEDIATE: blokada zapisu od początku transakcji. Przy odroczonym BEGIN transakcja,
+        # która najpierw czyta, a potem pisze, dostaje "database is locked" bez czekania
+        # na timeout, gdy równolegle pisze inny wątek (pipeline, pula zapisu pogody).
+        # Engine odczytów: zwykły BEGIN - w WAL czytelnicy nie czekają na piszących.
+        conn.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+    return engine
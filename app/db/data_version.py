@@ -0,0 +1,28 @@
+from sqlalchemy import text
+from app.db.dialect import upsert_sql
+from app.db.sql_utils import in_params, values_params
+
+def bump(conn, *tables: str) -> None:
+    """
+    Podbija licznik wersji tabel zmienionych w tej transakcji.
+    """
+    if not tables:
+        return
+    # nowy wpis startuje od 1 - wersja 0 oznacza "brak wpisu" w fingerprint()
+    values_sql, params = values_params("t", [{"n": t, "v": 1} for t in sorted(set(tables))], ["n", "v"])
+    conn.execute(text(upsert_sql(
+        conn, "etl_data_version", ["table_name", "version"], ["table_name"],
+        f"VALUES {values_sql}", update=[], extra={"version": "version+1"},
+    )), params)
+
+def fingerprint(conn, tables) -> str:
+    """
+    Tani odcisk stanu danych: "tabela:wersja;..." (brak wpisu = wersja 0).
+    """
+    tables = sorted(set(tables))
+    ph, params = in_params("t", tables)
+    found = dict(conn.execute(
+        text(f"SELECT table_name, version FROM etl_data_version WHERE table_name IN ({ph})"),
+        params,
+    ).fetchall())
+    return ";".join(f"{t}:{found.get(t, 0)}" for t in tables)
@@ -0,0 +1,97 @@
+from sqlalchemy import text
+
+# Warstwa różnic składni między backendami (DB_BACKEND: mysql / sqlite).
+# Funkcje biorą połączenie - dialekt odczytywany z conn.dialect.name,
+# więc ten sam kod ETL działa na MySQL (XAMPP) i na pliku SQLite.
+
+def name(conn) -> str:
+    return conn.dialect.name
+
+def is_mysql(conn) -> bool:
+    return conn.dialect.name in ("mysql", "mariadb")
+
+def upsert_sql(
+    conn,
+    table: str,
+    cols: list[str],
+    keys: list[str],
+    source_sql: str,
+    update: list[str] | None = None,
+    extra: dict[str, str] | None = None,
+) -> str:
+    """
+    INSERT z aktualizacją przy konflikcie klucza.
+    source_sql: "VALUES (...),(...)" albo "SELECT ...".
+    update: kolumny nadpisywane nową wartością (domyślnie cols bez keys).
+    extra: {kolumna: wyrażenie} liczone na istniejącym wierszu, np. {"version": "version+1"}.
+    Brak update i extra = wiersz istniejący zostaje bez zmian.
+    """
+    update = [c for c in cols if c not in keys] if update is None else update
+    extra = extra or {}
+    col_sql = ",".join(cols)
+
+    if is_mysql(conn):
+        sets = [f"{c}=VALUES({c})" for c in update] + [f"{c}={e}" for c, e in extra.items()]
+        if not sets:
+            sets = [f"{keys[0]}={keys[0]}"]
+        return f"INSERT INTO {table} ({col_sql}) {source_sql} ON DUPLICATE KEY UPDATE {', '.join(sets)}"
+
+    if source_sql.lstrip().upper().startswith("SELECT"):
+        # SQLite: bez WHERE "ON" po SELECT parsuje się jako warunek złączenia
+        source_sql = f"SELECT * FROM ({source_sql}) AS src WHERE true"
+    sets = [f"{c}=excluded.{c}" for c in update] + [f"{c}={e}" for c, e in extra.items()]
+    action = f"DO UPDATE SET {', '.join(sets)}" if sets else "DO NOTHING"
+    return f"INSERT INTO {table} ({col_sql}) {source_sql} ON CONFLICT ({','.join(keys)}) {action}"
+
+def driver_placeholders(conn, n: int) -> str:
+    """
+    "%s,%s,..." / "?,?,..." - znaczniki dla exec_driver_sql wg paramstyle sterownika.
+    """
+    style = conn.dialect.paramstyle
+    if style in ("format", "pyformat"):
+        return ",".join(["%s"] * n)
+    if style == "qmark":
+        return ",".join(["?"] * n)
+    if style == "numeric":
+        return ",".join(f":{i + 1}" for i in range(n))
+    if style == "numeric_dollar":
+        return ",".join(f"${i + 1}" for i in range(n))
+    raise ValueError(f"Unsupported paramstyle: {style}")
+
+def drop_temp_sql(conn, table: str) -> str:
+    return f"DROP TEMPORARY TABLE IF EXISTS {table}" if is_mysql(conn) else f"DROP TABLE IF EXISTS temp.{table}"
+
+def minus_seconds_sql(conn, expr: str, seconds: int) -> str:
+    """
+    Wyrażenie DATETIME cofnięte o seconds sekund.
+    """
+    seconds = int(seconds)
+    if is_mysql(conn):
+        return f"({expr} - INTERVAL {seconds} SECOND)"
+    return f"datetime({expr}, '-{seconds} seconds')"
+
+def update_join_sql(
+    conn,
+    table: str,
+    alias: str,
+    source: str,
+    src_alias: str,
+    on: str,
+    sets: dict[str, str],
+    where: str = "",
+) -> str:
+    """
+    UPDATE tabeli wartościami z innej tabeli (MySQL: UPDATE ... JOIN, reszta: UPDATE ... FROM).
+    sets: {kolumna tabeli: wyrażenie na src_alias}.
+    """
+    if is_mysql(conn):
+        set_sql = ", ".join(f"{alias}.{c} = {e}" for c, e in sets.items())
+        sql = f"UPDATE {table} {alias} JOIN {source} {src_alias} ON {on} SET {set_sql}"
+        return sql + (f" WHERE {where}" if where else "")
+    set_sql = ", ".join(f"{c} = {e}" for c, e in sets.items())
+    sql = f"UPDATE {table} AS {alias} SET {set_sql} FROM {source} AS {src_alias} WHERE {on}"
+    return sql + (f" AND {where}" if where else "")
+
+def server_version(conn) -> str:
+    sql = "SELECT VERSION()" if is_mysql(conn) else "SELECT 'SQLite ' || sqlite_version()"
+    return str(conn.execute(text(sql)).scalar())
@@ -0,0 +1,102 @@
+import sys
+from datetime import date, timedelta
+from sqlalchemy import text
+from app.db.connection import get_engine
+from app.db.dialect import is_mysql
+from app.etl.apply_weather_impact import SCHEDULED_FLIGHTS_SQL
+from app.etl.build_weather_risk_daily import (
+    CHANGED_DAYS_SQL,
+    RISK_GROUP_SQL,
+    SERVER_SCORE_SQL,
+    TMP_DAYS_DDL,
+    TMP_MARKS_DDL,
+    marks_sql,
+)
+from app.etl.report_aggregates import OFFERS_AGG_SQL, OPS_AGG_SQL
+from app.reports import report_operations_vs_risk, report_prices_vs_risk, report_weather_risk
+
+# tabele, które rosną z danymi - pełny skan którejkolwiek = błąd
+BIG_TABLES = {
+    "weather_hourly",
+    "weather_risk_daily",
+    "flights",
+    "amadeus_offer_requests",
+    "amadeus_flight_offers",
+}
+
+# nazwa -> SQL (albo funkcja conn -> SQL zależny od dialektu); kolejność jak w pipeline
+QUERIES = {
+    "risk_group (python)": RISK_GROUP_SQL,
+    "risk_marks (server)": marks_sql,
+    "risk_changed_days (server)": CHANGED_DAYS_SQL,
+    "risk_score (server)": SERVER_SCORE_SQL,
+    "impact_scheduled_flights": SCHEDULED_FLIGHTS_SQL,
+    "agg_ops_refresh": OPS_AGG_SQL,
+    "agg_offers_refresh": OFFERS_AGG_SQL,
+    "report_weather_risk": report_weather_risk.QUERY,
+    "report_ops_vs_risk": report_operations_vs_risk.QUERY,
+    "report_prices_vs_risk": report_prices_vs_risk.QUERY,
+}
+
+def explain(conn, sql: str, params: dict) -> list[dict]:
+    res = conn.execute(text("EXPLAIN " + sql), params)
+    return [dict(r._mapping) for r in res]
+
+def check_plan(plan: list[dict]) -> list[str]:
+    """
+    Zwraca listę problemów: pełny skan (type=ALL) albo skan całego indeksu
+    (type=index) na dużej tabeli - type=index czyta cały indeks niezależnie
+    od possible_keys, więc rośnie z tabelą tak samo jak ALL.
+    """
+    problems = []
+    for row in plan:
+        table = row.get("table") or ""
+        if table not in BIG_TABLES:
+            continue
+        typ = row.get("type")
+        if typ in ("ALL", "index"):
+            problems.append(
+                f"{table}: type={typ}, possible_keys={row.get('possible_keys')}, "
+                f"key={row.get('key')}, rows={row.get('rows')}"
+            )
+    return problems
+
+def run(country_code: str = "PL") -> tuple[bool, list[str]]:
+    """
+    EXPLAIN dla gorących zapytań ETL/raportów. Zwraca (ok, linie raportu).
+    Tabele tymczasowe trybu 'server' są tworzone na czas sprawdzenia.
+    Tylko MySQL - format EXPLAIN (type/possible_keys) jest specyficzny dla MySQL.
+    """
+    today = date.today()
+    params = {"cc": country_code, "d1": today, "d2": today + timedelta(days=7), "full": 0}
+    lines = []
+    ok = True
+
+    with get_engine().connect() as conn:
+        if not is_mysql(conn):
+            return True, [f"SKIP explain check: backend {conn.dialect.name}"]
+        conn.execute(text(TMP_MARKS_DDL))
+        conn.execute(text(TMP_DAYS_DDL))
+        try:
+            for name, sql in QUERIES.items():
+                if callable(sql):
+                    sql = sql(conn)
+                problems = check_plan(explain(conn, sql, params))
+                if problems:
+                    ok = False
+                    lines.append(f"FAIL {name}")
+                    lines.extend(f"  {p}" for p in problems)
+                else:
+                    lines.append(f"OK   {name}")
+        finally:
+            conn.execute(text("DROP TEMPORARY TABLE IF EXISTS tmp_risk_days"))
+            conn.execute(text("DROP TEMPORARY TABLE IF EXISTS tmp_risk_marks"))
+            conn.rollback()
+
+    return ok, lines
+
+if __name__ == "__main__":
+    cc = sys.argv[1] if len(sys.argv) > 1 else "PL"
+    ok, lines = run(cc)
+    print("\n".join(lines))
+    sys.exit(0 if ok else 1)
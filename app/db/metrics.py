@@ -0,0 +1,216 @@
+import contextlib
+import contextvars
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import event
+from app.config.settings import SQL_METRICS_PATH, SQL_METRICS_TOP
+
+# Instrumentacja poleceń SQL z eventów kursora SQLAlchemy (podpinana w get_engine).
+# Każde polecenie trafia do aktywnych przebiegów track_run() w bieżącym kontekście
+# (contextvars) - wątki robocze ETL dziedziczą go przez bind().
+# Round trip = jedno wywołanie kursora (executemany liczone raz); wiersze = cursor.rowcount
+# (zapisy; dla SELECT/RETURNING zależnie od sterownika, SQLite zwraca -1 -> 0).
+
+HIST_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+HIST_LABELS = [f"<={b}ms" for b in HIST_BOUNDS_MS] + [f">{HIST_BOUNDS_MS[-1]}ms"]
+
+_active: contextvars.ContextVar[tuple] = contextvars.ContextVar("sql_metrics_runs", default=())
+_write_lock = threading.Lock()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%s|%\(\w+\)s|\?|(?<![:\w]):\w+|\$\d+")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS_RE = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize(sql: str) -> str:
+    """
+    Postać polecenia bez wartości: literały i parametry -> ?, listy IN/VALUES zwinięte,
+    żeby np. INSERT z 10 i z 1000 wierszami liczyły się jako to samo polecenie.
+    """
+    s = _STRING_RE.sub("?", sql)
+    s = _NUMBER_RE.sub("?", s)
+    s = _PARAM_RE.sub("?", s)
+    s = _SPACE_RE.sub(" ", s).strip()
+    s = _LIST_RE.sub("(?)", s)
+    s = _ROWS_RE.sub("(?), ...", s)
+    return s[:500]
+
+def _bucket(ms: float) -> int:
+    for i, b in enumerate(HIST_BOUNDS_MS):
+        if ms <= b:
+            return i
+    return len(HIST_BOUNDS_MS)
+
+class RunMetrics:
+    """
+    Liczniki jednego przebiegu: round trips, wiersze (rowcount), czas w bazie,
+    histogram czasów poleceń oraz te same liczniki per znormalizowane polecenie.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now()
+        self._t0 = time.perf_counter()
+        self.wall_s = 0.0
+        self.ok = True
+        self.error = ""
+        self.statements = 0
+        self.rows = 0
+        self.db_ms = 0.0
+        self.hist = [0] * len(HIST_LABELS)
+        # sql -> [count, total_ms, max_ms, rows, hist]
+        self.by_sql: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, ms: float, rows: int) -> None:
+        b = _bucket(ms)
+        with self._lock:
+            self.statements += 1
+            self.rows += rows
+            self.db_ms += ms
+            self.hist[b] += 1
+            st = self.by_sql.get(sql)
+            if st is None:
+                st = self.by_sql[sql] = [0, 0.0, 0.0, 0, [0] * len(HIST_LABELS)]
+            st[0] += 1
+            st[1] += ms
+            st[2] = max(st[2], ms)
+            st[3] += rows
+            st[4][b] += 1
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.wall_s = time.perf_counter() - self._t0
+        if error is not None:
+            self.ok = False
+            self.error = f"{type(error).__name__}: {error}"
+
+    def slowest(self, top: int = SQL_METRICS_TOP) -> list[dict]:
+        with self._lock:
+            items = sorted(self.by_sql.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        return [
+            {
+                "sql": sql,
+                "calls": cnt,
+                "total_ms": round(total, 2),
+                "avg_ms": round(total / cnt, 3),
+                "max_ms": round(mx, 2),
+                "rows": rows,
+                "hist": _hist_dict(hist),
+            }
+            for sql, (cnt, total, mx, rows, hist) in items
+        ]
+
+    def summary(self, top: int = SQL_METRICS_TOP) -> dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "ok": self.ok,
+            "error": self.error,
+            "wall_s": round(self.wall_s, 4),
+            "statements": self.statements,
+            "rows": self.rows,
+            "db_ms": round(self.db_ms, 2),
+            "distinct_sql": len(self.by_sql),
+            "latency_hist": _hist_dict(self.hist),
+            "slowest": self.slowest(top),
+        }
+
+    def format(self, top: int = 3) -> str:
+        """
+        Kilka linii do logu GUI: sumy przebiegu i najdroższe polecenia.
+        """
+        lines = [
+            f"SQL [{self.name}]: {self.statements} round trips, rows={self.rows}, "
+            f"db={self.db_ms / 1000:.2f}s of {self.wall_s:.2f}s, distinct={len(self.by_sql)}"
+        ]
+        for s in self.slowest(top):
+            lines.append(f"  {s['total_ms']:.0f}ms x{s['calls']} (max {s['max_ms']:.0f}ms) {s['sql'][:120]}")
+        return "\n".join(lines)
+
+def _hist_dict(hist: list[int]) -> dict[str, int]:
+    return {label: n for label, n in zip(HIST_LABELS, hist) if n}
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault("metrics_t0", []).append(time.perf_counter())
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    runs = _active.get()
+    if not runs:
+        return
+    stack = conn.info.get("metrics_t0")
+    if not stack:
+        return  # przebieg zaczął się w trakcie polecenia
+    ms = (time.perf_counter() - stack.pop()) * 1000.0
+    rc = getattr(cursor, "rowcount", -1) or 0
+    sql = normalize(statement)
+    for run in runs:
+        run.record(sql, ms, rc if rc > 0 else 0)
+
+def _on_error(exception_context):
+    conn = exception_context.connection
+    if _active.get() and conn is not None and conn.info.get("metrics_t0"):
+        conn.info["metrics_t0"].pop()
+
+def install(engine) -> None:
+    """
+    Podpina liczniki pod engine (raz na engine). Bez aktywnego track_run narzut to jeden odczyt contextvar.
+    """
+    if event.contains(engine, "before_cursor_execute", _before):
+        return
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _on_error)
+
+def bind(fn):
+    """
+    fn uruchamiana w kopii bieżącego kontekstu - do puli wątków wewnątrz przebiegu,
+    żeby polecenia z wątków roboczych liczyły się do tego samego track_run.
+    """
+    ctx = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+def write_summary(summary: dict, path: Path | str = SQL_METRICS_PATH) -> None:
+    """
+    Dopisuje podsumowanie przebiegu jako jedną linię JSON (historia do porównań).
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(summary, ensure_ascii=False, default=str)
+    with _write_lock, p.open("a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+@contextlib.contextmanager
+def track_run(name: str, on_summary=None, path: Path | str | None = SQL_METRICS_PATH):
+    """
+    Zbiera metryki SQL dla bloku: with track_run("weather:PL", on_summary=log) as m: ...
+    Na końcu (także po wyjątku) zapisuje podsumowanie do path (JSONL, None = bez zapisu)
+    i przekazuje m.format() do on_summary.
+    """
+    run = RunMetrics(name)
+    token = _active.set(_active.get() + (run,))
+    err = None
+    try:
+        yield run
+    except BaseException as e:
+        err = e
+        raise
+    finally:
+        _active.reset(token)
+        run.finish(err)
+        if path is not None:
+            try:
+                write_summary(run.summary(), path)
+            except OSError:
+                pass  # metryki nie mogą przerwać ETL
+        if on_summary is not None:
+            on_summary(run.format())
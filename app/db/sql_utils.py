@@ -1,3 +1,5 @@
+from sqlalchemy import text
+
 def in_params(prefix: str, values: list[str]):
     """
     Zwraca: (placeholders, params_dict)
@@ -10,4 +12,70 @@ def in_params(prefix: str, values: list[str]):
         k = f"{prefix}{i}"
         params[k] = v
         ph.append(f":{k}")
-    return ",".join(ph), params
\ No newline at end of file
+    return ",".join(ph), params
+
+def values_params(prefix: str, rows: list[dict], cols: list[str]):
+    """
+    Zwraca: (values_sql, params_dict) dla wielowierszowego INSERT.
+    values_sql: "(:r0_a,:r0_b),(:r1_a,:r1_b)"
+    params: {"r0_a": ..., "r0_b": ..., "r1_a": ...}
+    """
+    params = {}
+    groups = []
+    for i, row in enumerate(rows):
+        ph = []
+        for c in cols:
+            k = f"{prefix}{i}_{c}"
+            params[k] = row[c]
+            ph.append(f":{k}")
+        groups.append("(" + ",".join(ph) + ")")
+    return ",".join(groups), params
+
+
+def chunks(values: list, size: int):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def insert_many_ids(conn, table: str, cols: list[str], rows: list[dict], id_col: str,
+                    chunk_size: int = 1000) -> list[int]:
+    """
+    Wielowierszowy INSERT (po chunk_size wierszy na polecenie), zwraca nadane id.
+    MySQL: InnoDB rezerwuje dla "simple insert" (znana liczba wierszy) ciągły blok
+    wartości AUTO_INCREMENT, a lastrowid wskazuje pierwszą z nich. Przy
+    auto_increment_increment > 1 (Galera, group replication) id nie są kolejne -
+    wtedy RuntimeError zamiast cichego przypisania biletów do złych lotów/pasażerów.
+    Pozostałe backendy: RETURNING id_col (id rosną w kolejności VALUES).
+    """
+    mysql = conn.dialect.name in ("mysql", "mariadb")
+    if mysql:
+        _check_autoinc_step(conn)
+    ids: list[int] = []
+    for part in chunks(rows, chunk_size):
+        values_sql, params = values_params("r", part, cols)
+        sql = f"INSERT INTO {table} ({','.join(cols)}) VALUES {values_sql}"
+        if not mysql:
+            new_ids = sorted(int(r[0]) for r in conn.execute(text(sql + f" RETURNING {id_col}"), params))
+            if len(new_ids) != len(part):
+                raise RuntimeError(f"{table}: inserted {len(new_ids)} rows, expected {len(part)}")
+            ids.extend(new_ids)
+            continue
+        res = conn.execute(text(sql), params)
+        first = int(res.lastrowid)
+        if res.rowcount != len(part):
+            raise RuntimeError(f"{table}: inserted {res.rowcount} rows, expected {len(part)}")
+        ids.extend(range(first, first + len(part)))
+    return ids
+
+def _check_autoinc_step(conn) -> None:
+    # raz na połączenie (conn.info żyje razem z połączeniem w puli)
+    step = conn.info.get("auto_increment_increment")
+    if step is None:
+        step = conn.info["auto_increment_increment"] = int(
+            conn.execute(text("SELECT @@SESSION.auto_increment_increment")).scalar()
+        )
+    if step != 1:
+        raise RuntimeError(
+            f"insert_many_ids needs auto_increment_increment=1 (got {step}) - "
+            "ids of a multi-row INSERT would not be consecutive; use bulk=False"
+        )
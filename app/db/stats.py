@@ -0,0 +1,114 @@
+import threading
+import time
+from sqlalchemy import text
+from app.db.connection import get_read_engine
+from app.db.dialect import is_mysql
+from app.db.sql_utils import in_params
+from app.config.settings import STATS_TTL_S
+
+STATS_TABLES = [
+    "airports",
+    "weather_hourly",
+    "weather_risk_daily",
+    "flights",
+    "tickets",
+    "amadeus_flight_offers",
+]
+
+def estimate_counts(conn, tables: list[str]) -> dict[str, int]:
+    """
+    Szacunkowa liczba wierszy z information_schema (statystyki InnoDB, bez skanu tabel).
+    Poza MySQL brak takich statystyk - zwraca dokładne COUNT(*).
+    """
+    if not is_mysql(conn):
+        return exact_counts(conn, tables)
+    try:
+        # MySQL 8 domyślnie cache'uje statystyki information_schema do 24h
+        conn.execute(text("SET SESSION information_schema_stats_expiry = 0"))
+    except Exception:
+        pass  # MariaDB / MySQL 5.7 - brak zmiennej, statystyki i tak są bieżące
+
+    in_sql, params = in_params("t", tables)
+    rows = conn.execute(text(f"""
+        SELECT TABLE_NAME, TABLE_ROWS
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({in_sql})
+    """), params).fetchall()
+    found = {name: int(cnt or 0) for name, cnt in rows}
+    return {t: found.get(t, 0) for t in tables}
+
+def exact_counts(conn, tables: list[str]) -> dict[str, int]:
+    """
+    Dokładne COUNT(*) - pełny skan indeksu każdej tabeli, drogie przy dużych danych.
+    """
+    return {t: int(conn.execute(text(f"SELECT COUNT(*) FROM {t}")).scalar() or 0) for t in tables}
+
+class StatsService:
+    """
+    Statystyki tabel dla GUI: szacunki (domyślnie) albo dokładne COUNT(*),
+    trzymane w cache przez ttl_s. refresh_async liczy w wątku w tle i oddaje
+    wynik do callbacku - wątek Tk nigdy nie czeka na bazę.
+    """
+
+    def __init__(self, tables: list[str] | None = None, ttl_s: float = STATS_TTL_S):
+        self.tables = list(tables or STATS_TABLES)
+        self.ttl_s = ttl_s
+        self._cache: dict[bool, tuple[float, dict[str, int]]] = {}
+        self._lock = threading.Lock()
+        self._running: set[bool] = set()
+        # force w trakcie odświeżania: callback do ponownego przebiegu po bieżącym
+        self._pending: dict[bool, object] = {}
+
+    def cached(self, exact: bool = False) -> dict[str, int] | None:
+        with self._lock:
+            hit = self._cache.get(exact)
+        if hit and time.monotonic() - hit[0] < self.ttl_s:
+            return hit[1]
+        return None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def get(self, exact: bool = False, force: bool = False) -> dict[str, int]:
+        if not force:
+            hit = self.cached(exact)
+            if hit is not None:
+                return hit
+        with get_read_engine().connect() as conn:
+            counts = exact_counts(conn, self.tables) if exact else estimate_counts(conn, self.tables)
+        with self._lock:
+            self._cache[exact] = (time.monotonic(), counts)
+        return counts
+
+    def refresh_async(self, callback, exact: bool = False, force: bool = False) -> bool:
+        """
+        callback(counts, exact, error) wołany z wątku roboczego.
+        Zwraca False, gdy odświeżanie tego rodzaju już trwa: zwykłe wywołanie jest
+        łączone z bieżącym, a force (np. po ETL) zostaje zapamiętany i wykonany
+        ponownie po nim - bieżący przebieg mógł czytać dane sprzed zmiany.
+        """
+        with self._lock:
+            if exact in self._running:
+                if force:
+                    self._pending[exact] = callback
+                return False
+            self._running.add(exact)
+
+        def job(callback=callback, force=force):
+            while True:
+                try:
+                    counts, err = self.get(exact=exact, force=force), None
+                except Exception as e:
+                    counts, err = {}, e
+                with self._lock:
+                    pending = self._pending.pop(exact, None)
+                    if pending is None:
+                        self._running.discard(exact)
+                callback(counts, exact, err)
+                if pending is None:
+                    return
+                callback, force = pending, True
+
+        threading.Thread(target=job, daemon=True).start()
+        return True
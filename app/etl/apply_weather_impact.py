@@ -1,41 +1,56 @@
 import random
+import numpy as np
 from sqlalchemy import text
 from app.db.connection import get_engine
+from app.db.dialect import drop_temp_sql, update_join_sql
+from app.etl.report_aggregates import refresh_ops
+
+# risk_level -> (p_cancel, p_delay, delay_min_od, delay_min_do)
+# probabilistyki (proste i czytelne w pracy)
+IMPACT_PROFILES = {
+    "HIGH": (0.08, 0.45, 30, 180),
+    "MEDIUM": (0.03, 0.25, 15, 90),
+    "LOW": (0.01, 0.12, 5, 40),
+}
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+
+# flights.dep_day = DATE(sched_dep) jako kolumna generowana (sql/008)
+# ORDER BY: losowania idą po kolei wierszy - bez stałej kolejności seed nie daje powtarzalności
+SCHEDULED_FLIGHTS_SQL = """
+    SELECT f.flight_id, f.dep_day AS day, f.dep_iata,
+           COALESCE(r.risk_level,'LOW') AS risk_level
+    FROM flights f
+    JOIN airports a ON a.iata_code = f.dep_iata
+    LEFT JOIN weather_risk_daily r
+      ON r.iata_code = f.dep_iata
+     AND r.source = 'forecast'
+     AND r.day = f.dep_day
+    WHERE a.country_code = :cc
+      AND f.status = 'scheduled'
+    ORDER BY f.flight_id
+"""
+
+def run(country_code: str, mode: str = "row", seed: int | None = None) -> str:
+    """
+    mode: 'row' - losowanie i UPDATE per lot,
+          'set' - losowanie wektorowe (NumPy) i kilka poleceń zbiorczych.
+    seed: opcjonalne ziarno - ten sam seed daje te same wyniki.
+    """
+    if mode == "set":
+        return _run_set(country_code, seed)
 
-def run(country_code: str) -> str:
     engine = get_engine()
+    rng = random.Random(seed)
     updated = 0
 
     with engine.begin() as conn:
-        rows = conn.execute(text("""
-            SELECT f.flight_id, DATE(f.sched_dep) AS day, f.dep_iata,
-                   COALESCE(r.risk_level,'LOW') AS risk_level
-            FROM flights f
-            JOIN airports a ON a.iata_code = f.dep_iata
-            LEFT JOIN weather_risk_daily r
-              ON r.iata_code = f.dep_iata
-             AND r.day = DATE(f.sched_dep)
-             AND r.source = 'forecast'
-            WHERE a.country_code = :cc
-              AND f.status = 'scheduled'
-        """), {"cc": country_code}).fetchall()
+        rows = conn.execute(text(SCHEDULED_FLIGHTS_SQL), {"cc": country_code}).fetchall()
 
         for flight_id, day, dep_iata, risk in rows:
-            # probabilistyki (proste i czytelne w pracy)
-            if risk == "HIGH":
-                p_cancel = 0.08
-                p_delay = 0.45
-                delay_min = random.randint(30, 180)
-            elif risk == "MEDIUM":
-                p_cancel = 0.03
-                p_delay = 0.25
-                delay_min = random.randint(15, 90)
-            else:
-                p_cancel = 0.01
-                p_delay = 0.12
-                delay_min = random.randint(5, 40)
-
-            rnd = random.random()
+            p_cancel, p_delay, d_lo, d_hi = IMPACT_PROFILES.get(risk, IMPACT_PROFILES["LOW"])
+            delay_min = rng.randint(d_lo, d_hi)
+
+            rnd = rng.random()
             if rnd < p_cancel:
                 conn.execute(text("""
                     UPDATE flights SET status='cancelled', delay_min=0 WHERE flight_id=:id
@@ -46,7 +61,82 @@ def run(country_code: str) -> str:
                 """), {"id": flight_id, "d": delay_min})
             updated += 1
 
+        if rows:
+            refresh_ops(conn, country_code, min(r[1] for r in rows), max(r[1] for r in rows))
+
     return f"OK: processed {updated} scheduled flights for impact"
 
+def draw_impact(risk_levels: list[str], seed: int | None = None):
+    """
+    Wektorowe losowanie skutków dla wszystkich lotów naraz.
+    Zwraca (cancel_mask, delay_mask, delay_min) jako tablice NumPy.
+    """
+    n = len(risk_levels)
+    lvl_idx = {lvl: i for i, lvl in enumerate(RISK_LEVELS)}
+    codes = np.fromiter((lvl_idx.get(r, 0) for r in risk_levels), dtype=np.int8, count=n)
+    profiles = np.array([IMPACT_PROFILES[lvl] for lvl in RISK_LEVELS], dtype=np.float64)
+
+    p_cancel = profiles[codes, 0]
+    p_delay = profiles[codes, 1]
+    d_lo = profiles[codes, 2].astype(np.int64)
+    d_hi = profiles[codes, 3].astype(np.int64)
+
+    rng = np.random.default_rng(seed)
+    rnd = rng.random(n)
+    delay_min = rng.integers(d_lo, d_hi + 1)
+
+    cancel_mask = rnd < p_cancel
+    delay_mask = ~cancel_mask & (rnd < p_cancel + p_delay)
+    return cancel_mask, delay_mask, delay_min
+
+def _run_set(country_code: str, seed: int | None) -> str:
+    engine = get_engine()
+
+    with engine.begin() as conn:
+        rows = conn.execute(text(SCHEDULED_FLIGHTS_SQL), {"cc": country_code}).fetchall()
+        if not rows:
+            return "OK: processed 0 scheduled flights for impact (set)"
+
+        flight_ids = np.array([r[0] for r in rows], dtype=np.int64)
+        cancel_mask, delay_mask, delay_min = draw_impact([r[3] for r in rows], seed)
+
+        staged = [
+            {"id": int(fid), "st": "cancelled", "d": 0}
+            for fid in flight_ids[cancel_mask]
+        ] + [
+            {"id": int(fid), "st": "delayed", "d": int(d)}
+            for fid, d in zip(flight_ids[delay_mask], delay_min[delay_mask])
+        ]
+
+        if staged:
+            # tabela tymczasowa żyje w tym połączeniu - w MySQL nie znika przy rollbacku,
+            # więc DROP w finally (inaczej wraca do puli i następny CREATE kończy się błędem)
+            conn.execute(text("""
+                CREATE TEMPORARY TABLE tmp_flight_impact (
+                  flight_id BIGINT PRIMARY KEY,
+                  status VARCHAR(10) NOT NULL,
+                  delay_min INT NOT NULL
+                )
+            """))
+            try:
+                conn.execute(text("""
+                    INSERT INTO tmp_flight_impact (flight_id, status, delay_min)
+                    VALUES (:id, :st, :d)
+                """), staged)
+                conn.execute(text(update_join_sql(
+                    conn, "flights", "f", "tmp_flight_impact", "t", "t.flight_id = f.flight_id",
+                    {"status": "t.status", "delay_min": "t.delay_min"},
+                    where="f.status = 'scheduled'",
+                )))
+            finally:
+                conn.execute(text(drop_temp_sql(conn, "tmp_flight_impact")))
+
+            refresh_ops(conn, country_code, min(r[1] for r in rows), max(r[1] for r in rows))
+
+    return (
+        f"OK: processed {len(rows)} scheduled flights for impact (set): "
+        f"cancelled={int(cancel_mask.sum())}, delayed={int(delay_mask.sum())}"
+    )
+
 if __name__ == "__main__":
     print(run("PL"))
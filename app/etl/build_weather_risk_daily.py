@@ -1,5 +1,9 @@
 from sqlalchemy import text
+from app.config.settings import RISK_WATERMARK_MARGIN_S
 from app.db.connection import get_engine
+from app.db.data_version import bump
+from app.db.dialect import drop_temp_sql, minus_seconds_sql, upsert_sql
+from app.etl.report_aggregates import refresh_offers, refresh_ops
 
 def risk_level(score: float) -> str:
     if score >= 2.0:
@@ -8,7 +12,110 @@ def risk_level(score: float) -> str:
         return "MEDIUM"
     return "LOW"
 
-def run(country_code: str) -> str:
+# Ten sam scoring co risk_level(), liczony po stronie serwera
+SCORE_SQL = "(s.wind_r + s.prec_r + s.vis_r)"
+RISK_LEVEL_SQL = f"CASE WHEN {SCORE_SQL} >= 2.0 THEN 'HIGH' WHEN {SCORE_SQL} >= 1.0 THEN 'MEDIUM' ELSE 'LOW' END"
+
+SCORE_COLUMNS_SQL = """
+  AVG(CASE WHEN w.windspeed_ms IS NOT NULL AND w.windspeed_ms > 12 THEN 1 ELSE 0 END) AS wind_r,
+  AVG(CASE WHEN w.precipitation_mm IS NOT NULL AND w.precipitation_mm > 1.0 THEN 1 ELSE 0 END) AS prec_r,
+  AVG(CASE WHEN w.visibility_m IS NOT NULL AND w.visibility_m < 3000 THEN 1 ELSE 0 END) AS vis_r
+"""
+
+# weather_hourly.day = DATE(dt_utc) jako kolumna generowana (sql/008) -
+# grupowanie/złączenia po dniu idą po indeksie idx_weather_day_score
+RISK_GROUP_SQL = f"""
+    SELECT
+      a.iata_code,
+      w.day,
+      w.source,
+      {SCORE_COLUMNS_SQL}
+    FROM airports a
+    JOIN weather_hourly w ON w.iata_code = a.iata_code
+    WHERE a.country_code=:cc
+    GROUP BY a.iata_code, w.source, w.day
+"""
+
+TMP_MARKS_DDL = """
+    CREATE TEMPORARY TABLE tmp_risk_marks (
+      iata_code CHAR(3) NOT NULL,
+      source VARCHAR(20) NOT NULL,
+      last_updated_at DATETIME NOT NULL,
+      PRIMARY KEY (iata_code, source)
+    )
+"""
+
+TMP_DAYS_DDL = """
+    CREATE TEMPORARY TABLE tmp_risk_days (
+      iata_code CHAR(3) NOT NULL,
+      source VARCHAR(20) NOT NULL,
+      day DATE NOT NULL,
+      PRIMARY KEY (iata_code, source, day)
+    )
+"""
+
+# {last_updated_at}: MAX(w.updated_at) cofnięte o RISK_WATERMARK_MARGIN_S (marks_sql)
+MARKS_SQL = """
+    INSERT INTO tmp_risk_marks (iata_code, source, last_updated_at)
+    SELECT w.iata_code, w.source, {last_updated_at}
+    FROM airports a
+    JOIN weather_hourly w ON w.iata_code = a.iata_code
+    WHERE a.country_code=:cc
+    GROUP BY w.iata_code, w.source
+"""
+
+CHANGED_DAYS_SQL = """
+    INSERT INTO tmp_risk_days (iata_code, source, day)
+    SELECT DISTINCT w.iata_code, w.source, w.day
+    FROM airports a
+    JOIN weather_hourly w ON w.iata_code = a.iata_code
+    LEFT JOIN weather_risk_watermark m
+      ON m.iata_code = w.iata_code
+     AND m.source = w.source
+    WHERE a.country_code=:cc
+      AND (:full = 1 OR m.last_updated_at IS NULL OR w.updated_at >= m.last_updated_at)
+"""
+
+RISK_COLS = ["iata_code", "day", "source", "risk_score", "risk_level"]
+RISK_KEYS = ["iata_code", "day", "source"]
+
+# sam SELECT (EXPLAIN w app/db/explain_check); upsert doklejany wg dialektu
+SERVER_SCORE_SQL = f"""
+    SELECT s.iata_code, s.day, s.source, {SCORE_SQL}, {RISK_LEVEL_SQL}
+    FROM (
+      SELECT
+        w.iata_code,
+        w.day,
+        w.source,
+        {SCORE_COLUMNS_SQL}
+      FROM tmp_risk_days d
+      JOIN weather_hourly w
+        ON w.iata_code = d.iata_code
+       AND w.source = d.source
+       AND w.day = d.day
+      GROUP BY w.iata_code, w.source, w.day
+    ) s
+"""
+
+def marks_sql(conn) -> str:
+    return MARKS_SQL.format(
+        last_updated_at=minus_seconds_sql(conn, "MAX(w.updated_at)", RISK_WATERMARK_MARGIN_S),
+    )
+
+def server_score_sql(conn) -> str:
+    return upsert_sql(conn, "weather_risk_daily", RISK_COLS, RISK_KEYS, SERVER_SCORE_SQL)
+
+def run(country_code: str, mode: str = "python", full: bool = False) -> str:
+    """
+    mode: 'python' - GROUP BY po całej historii kraju i upsert per wiersz,
+          'server' - jedno INSERT ... SELECT ... ON DUPLICATE KEY UPDATE,
+                     tylko dla dni, w których weather_hourly zmieniło się od
+                     ostatniego przebiegu (watermark per lotnisko/źródło).
+    full: w trybie 'server' ignoruje watermark i przelicza całą historię.
+    """
+    if mode == "server":
+        return _run_server(country_code, full)
+
     engine = get_engine()
 
     # Prosty scoring:
@@ -17,32 +124,67 @@ def run(country_code: str) -> str:
     # - widoczność < 3000 m
     # score = suma 0..3
     with engine.begin() as conn:
-        rows = conn.execute(text("""
-            SELECT
-              a.iata_code,
-              DATE(w.dt_utc) AS day,
-              w.source,
-              AVG(CASE WHEN w.windspeed_ms IS NOT NULL AND w.windspeed_ms > 12 THEN 1 ELSE 0 END) AS wind_r,
-              AVG(CASE WHEN w.precipitation_mm IS NOT NULL AND w.precipitation_mm > 1.0 THEN 1 ELSE 0 END) AS prec_r,
-              AVG(CASE WHEN w.visibility_m IS NOT NULL AND w.visibility_m < 3000 THEN 1 ELSE 0 END) AS vis_r
-            FROM airports a
-            JOIN weather_hourly w ON w.iata_code = a.iata_code
-            WHERE a.country_code=:cc
-            GROUP BY a.iata_code, DATE(w.dt_utc), w.source
-        """), {"cc": country_code}).fetchall()
+        rows = conn.execute(text(RISK_GROUP_SQL), {"cc": country_code}).fetchall()
 
+        upsert = text(upsert_sql(
+            conn, "weather_risk_daily", RISK_COLS, RISK_KEYS, "VALUES (:iata, :day, :src, :score, :lvl)",
+        ))
         up = 0
         for iata, day, source, wind_r, prec_r, vis_r in rows:
             score = float(wind_r or 0) + float(prec_r or 0) + float(vis_r or 0)
             lvl = risk_level(score)
-            conn.execute(text("""
-                INSERT INTO weather_risk_daily (iata_code, day, source, risk_score, risk_level)
-                VALUES (:iata, :day, :src, :score, :lvl)
-                ON DUPLICATE KEY UPDATE risk_score=VALUES(risk_score), risk_level=VALUES(risk_level)
-            """), {"iata": iata, "day": day, "src": source, "score": score, "lvl": lvl})
+            conn.execute(upsert, {"iata": iata, "day": day, "src": source, "score": score, "lvl": lvl})
             up += 1
 
+        if rows:
+            # zmiana poziomu ryzyka przesuwa loty/oferty między kubełkami raportów
+            d1, d2 = min(r[1] for r in rows), max(r[1] for r in rows)
+            refresh_ops(conn, country_code, d1, d2)
+            refresh_offers(conn, d1, d2, country_code)
+            bump(conn, "weather_risk_daily")
+
     return f"OK: upserted {up} risk_daily rows for {country_code}"
 
+def _run_server(country_code: str, full: bool) -> str:
+    engine = get_engine()
+
+    with engine.begin() as conn:
+        # tabele tymczasowe usuwane w finally (jak w explain_check) - w MySQL
+        # przeżywają rollback i zostałyby na połączeniu w puli
+        try:
+            # 1) nowy watermark liczony PRZED scoringiem, cofnięty o margines:
+            #    updated_at jest ustawiane przy zapisie, a wiersz widać dopiero po commicie,
+            #    więc trwająca transakcja pogody może zatwierdzić wiersze starsze niż
+            #    MAX(updated_at). Margines obejmuje transakcje krótsze niż
+            #    RISK_WATERMARK_MARGIN_S, kosztem ponownego przeliczenia kilku dni.
+            conn.execute(text(TMP_MARKS_DDL))
+            conn.execute(text(marks_sql(conn)), {"cc": country_code})
+
+            # 2) dni do przeliczenia: tylko te ze zmienionymi wierszami godzinowymi
+            #    (>= bo updated_at ma rozdzielczość sekundy)
+            conn.execute(text(TMP_DAYS_DDL))
+            conn.execute(text(CHANGED_DAYS_SQL), {"cc": country_code, "full": 1 if full else 0})
+
+            # 3) scoring + upsert w jednym poleceniu po stronie serwera
+            res = conn.execute(text(server_score_sql(conn)))
+            days_cnt, d1, d2 = conn.execute(text("SELECT COUNT(*), MIN(day), MAX(day) FROM tmp_risk_days")).one()
+            if days_cnt:
+                # zmiana poziomu ryzyka przesuwa loty/oferty między kubełkami raportów
+                refresh_ops(conn, country_code, d1, d2)
+                refresh_offers(conn, d1, d2, country_code)
+                bump(conn, "weather_risk_daily")
+
+            # 4) zapis watermarku w tej samej transakcji
+            conn.execute(text(upsert_sql(
+                conn, "weather_risk_watermark", ["iata_code", "source", "last_updated_at"], ["iata_code", "source"],
+                "SELECT iata_code, source, last_updated_at FROM tmp_risk_marks",
+            )))
+        finally:
+            conn.execute(text(drop_temp_sql(conn, "tmp_risk_days")))
+            conn.execute(text(drop_temp_sql(conn, "tmp_risk_marks")))
+
+    scope = "full" if full else "incremental"
+    return f"OK: rescored {days_cnt} airport-days ({scope}, server-side) for {country_code}, affected rows={res.rowcount}"
+
 if __name__ == "__main__":
     print(run("PL"))
@@ -1,7 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import date, datetime, timedelta
+import threading
+import numpy as np
 from sqlalchemy import text
 from app.db.connection import get_engine
-from app.api.open_meteo_client import fetch_hourly, generate_synthetic_hourly_weather
+from app.db.dialect import driver_placeholders, upsert_sql
+from app.db.metrics import bind
+from app.db.sql_utils import in_params
+from app.etl.weather_retention import ensure_partitions_ahead
+from app.api.open_meteo_client import (
+    HourlyWeatherBatch,
+    fetch_hourly,
+    fetch_hourly_many,
+    generate_synthetic_hourly_columns,
+    make_session,
+)
+
+def hist_cutoff() -> date:
+    return date.today() - timedelta(days=2)
 
 def split_days(start_date: str, end_date: str):
     d1 = datetime.strptime(start_date, "%Y-%m-%d").date()
@@ -12,140 +29,181 @@ def split_days(start_date: str, end_date: str):
         days.append(cur)
         cur += timedelta(days=1)
 
-    today = date.today()
-    hist_cutoff = today - timedelta(days=2)
-    historical = [d for d in days if d <= hist_cutoff]
-    forecast = [d for d in days if d > hist_cutoff]
+    cutoff = hist_cutoff()
+    historical = [d for d in days if d <= cutoff]
+    forecast = [d for d in days if d > cutoff]
     return historical, forecast
 
+def day_sources(dt_utc) -> list[str]:
+    """
+    source per godzina wg tej samej granicy co split_days:
+    dzień <= hist_cutoff -> 'historical', późniejsze -> 'forecast'.
+    dt_utc: lista datetime albo datetime64 (jak w HourlyWeatherBatch).
+    """
+    cutoff = hist_cutoff()
+    if isinstance(dt_utc, np.ndarray):
+        hist = dt_utc.astype("datetime64[D]") <= np.datetime64(cutoff.isoformat(), "D")
+        return np.where(hist, "historical", "forecast").tolist()
+    c = cutoff.isoformat()
+    return ["historical" if str(dt)[:10] <= c else "forecast" for dt in dt_utc]
+
+
+# kolejność jak w HourlyWeatherBatch.to_params
+WEATHER_COLS = [
+    "iata_code", "dt_utc", "temperature_c", "windspeed_ms", "precipitation_mm", "visibility_m", "source", "is_synthetic",
+]
 
-def save_weather_hourly(conn, iata_code: str, rows, source: str):
-    conn.execute(
-        text("""
-            INSERT INTO weather_hourly
-              (iata_code, dt_utc, temperature_c, windspeed_ms, precipitation_mm, visibility_m, source)
-            VALUES
-              (:iata, :dt, :t, :w, :p, :v, :src)
-            ON DUPLICATE KEY UPDATE
-              temperature_c=VALUES(temperature_c),
-              windspeed_ms=VALUES(windspeed_ms),
-              precipitation_mm=VALUES(precipitation_mm),
-              visibility_m=VALUES(visibility_m),
-              source=VALUES(source)
-        """),
-        [
-            {
-                "iata": iata_code,
-                "dt": r.dt_utc,
-                "t": r.temperature_c,
-                "w": r.windspeed_ms,
-                "p": r.precipitation_mm,
-                "v": r.visibility_m,
-                "src": source,
-            }
-            for r in rows
-        ],
+def save_weather_hourly(conn, iata_code: str, rows, synthetic: bool = False):
+    """
+    rows: HourlyWeatherBatch (albo lista HourlyWeatherRow - zamieniana na batch).
+    Krotki z batcha idą prosto do executemany sterownika (PyMySQL składa je
+    w wielowierszowe INSERT-y), bez obiektu/słownika per godzinę.
+    source (ENUM historical/forecast) wynika z dnia godziny - patrz day_sources;
+    synthetic=True oznacza godziny z fallbacku (is_synthetic=1).
+    """
+    batch = rows if isinstance(rows, HourlyWeatherBatch) else HourlyWeatherBatch.from_rows(rows)
+    if len(batch) == 0:
+        return
+    conn.exec_driver_sql(
+        upsert_sql(
+            conn, "weather_hourly", WEATHER_COLS, ["iata_code", "dt_utc", "source"],
+            f"VALUES ({driver_placeholders(conn, len(WEATHER_COLS))})",
+        ),
+        batch.to_params(iata_code, day_sources(batch.dt_utc), synthetic),
     )
 
-def etl_weather_for_airport(iata: str, lat: float, lon: float, start: date, end: date) -> str:
-    engine = get_engine()
-    with engine.begin() as conn:
-        try:
-            api_rows = fetch_hourly(lat, lon, start.isoformat(), end.isoformat(), mode="historical")
-            if not api_rows or not api_rows.get("hourly") or len(api_rows["hourly"].get("time", [])) < 1:
-                raise ValueError("Open-Meteo returned empty hourly data")
-
-            # Konwersja do HourlyWeatherRow
-            rows = []
-            h = api_rows["hourly"]
-            for i, t in enumerate(h["time"]):
-                rows.append(
-                    type('Row', (), dict(
-                        dt_utc=datetime.strptime(t, "%Y-%m-%dT%H:%M"),
-                        temperature_c=h["temperature_2m"][i] if i < len(h["temperature_2m"]) else None,
-                        windspeed_ms=h["wind_speed_10m"][i] if i < len(h["wind_speed_10m"]) else None,
-                        precipitation_mm=h["precipitation"][i] if i < len(h["precipitation"]) else None,
-                        visibility_m=h["visibility"][i] if i < len(h["visibility"]) else None,
-                    ))()
-                )
-            save_weather_hourly(conn, iata, rows, source="api")
-            return f"OK: Open-Meteo saved {len(rows)} hourly rows for {iata}"
+def _api_batch(api_rows: dict) -> HourlyWeatherBatch:
+    batch = HourlyWeatherBatch.from_open_meteo(api_rows)
+    if len(batch) < 1:
+        raise ValueError("Open-Meteo returned empty hourly data")
+    return batch
 
-        except Exception as e:
-            msg = f"FALLBACK weather for {iata}: {type(e).__name__}: {e}"
-            print(msg)
-
-            synth_rows = generate_synthetic_hourly_weather(iata, start, end)
-            save_weather_hourly(conn, iata, synth_rows, source="synthetic")
-            return f"{msg}\nOK: saved synthetic {len(synth_rows)} hourly rows for {iata}"
-
-def _save_hourly(conn, iata: str, data: dict, source: str) -> int:
-    h = data.get("hourly", {})
-    times = h.get("time", [])
-    t2m = h.get("temperature_2m", [])
-    wind = h.get("wind_speed_10m", [])
-    prec = h.get("precipitation", [])
-    vis = h.get("visibility", [])
-
-    n = 0
-    for i in range(len(times)):
-        dt_utc = times[i].replace("T", " ")
-        conn.execute(text("""
-            INSERT INTO weather_hourly
-              (iata_code, dt_utc, source, temperature_c, windspeed_ms, precipitation_mm, visibility_m)
-            VALUES
-              (:iata, :dt, :src, :t, :w, :p, :v)
-            ON DUPLICATE KEY UPDATE
-              temperature_c=VALUES(temperature_c),
-              windspeed_ms=VALUES(windspeed_ms),
-              precipitation_mm=VALUES(precipitation_mm),
-              visibility_m=VALUES(visibility_m)
-        """), {
-            "iata": iata,
-            "dt": dt_utc,
-            "src": source,
-            "t": t2m[i] if i < len(t2m) else None,
-            "w": wind[i] if i < len(wind) else None,
-            "p": prec[i] if i < len(prec) else None,
-            "v": vis[i] if i < len(vis) else None,
-        })
-        n += 1
-    return n
+def _save_api(iata: str, api_rows: dict, db_slots=None) -> str:
+    batch = _api_batch(api_rows)
+    with db_slots or nullcontext():
+        with get_engine().begin() as conn:
+            save_weather_hourly(conn, iata, batch)
+    return f"OK: Open-Meteo saved {len(batch)} hourly rows for {iata}"
+
+def _save_fallback(iata: str, start: date, end: date, e: Exception, db_slots=None) -> str:
+    msg = f"FALLBACK weather for {iata}: {type(e).__name__}: {e}"
+    print(msg)
+
+    synth = generate_synthetic_hourly_columns(iata, start, end)
+    with db_slots or nullcontext():
+        with get_engine().begin() as conn:
+            save_weather_hourly(conn, iata, synth, synthetic=True)
+    return f"{msg}\nOK: saved synthetic {len(synth)} hourly rows for {iata}"
 
+def etl_weather_for_airport(iata: str, lat: float, lon: float, start: date, end: date, session=None, db_slots=None) -> str:
+    """
+    Pobranie z Open-Meteo (poza transakcją), zapis w krótkiej transakcji.
+    session: współdzielona sesja HTTP, db_slots: semafor ograniczający liczbę
+    równoczesnych zapisów (połączeń DB) w trybie równoległym.
+    """
+    try:
+        api_rows = fetch_hourly(lat, lon, start.isoformat(), end.isoformat(), mode="historical", session=session)
+        return _save_api(iata, api_rows, db_slots)
+    except Exception as e:
+        return _save_fallback(iata, start, end, e, db_slots)
+
+def etl_weather_for_airports(locations: list[tuple[str, float, float]], start: date, end: date, session=None, db_slots=None) -> list[str]:
+    """
+    Jedna paczka lotnisk = jedno wywołanie Open-Meteo (lista współrzędnych),
+    odpowiedź rozdzielana per lotnisko do save_weather_hourly.
+    Błąd całej paczki -> fallback syntetyczny dla każdego lotniska z paczki.
+    """
+    try:
+        by_iata = fetch_hourly_many(locations, start.isoformat(), end.isoformat(), mode="historical", session=session)
+    except Exception as e:
+        return [_save_fallback(iata, start, end, e, db_slots) for iata, _lat, _lon in locations]
+
+    out = []
+    for iata, _lat, _lon in locations:
+        try:
+            out.append(_save_api(iata, by_iata.get(iata), db_slots))
+        except Exception as e:
+            out.append(_save_fallback(iata, start, end, e, db_slots))
+    return out
 
 # Main ETL entrypoint for country-level weather ETL
 from app.config.top_airports import TOP_AIRPORTS
 from app.config.eu_countries import EU_COUNTRIES
 
-def run(country_code: str, start_date: str, end_date: str) -> str:
+def load_coordinates(iatas: list[str]) -> dict:
+    """
+    Współrzędne lotnisk jednym zapytaniem: {iata: (lat, lon)}.
+    """
+    if not iatas:
+        return {}
+    ph, params = in_params("i", iatas)
+    engine = get_engine()
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(f"SELECT iata_code, latitude, longitude FROM airports WHERE iata_code IN ({ph})"),
+            params,
+        ).fetchall()
+    return {iata: (lat, lon) for iata, lat, lon in rows}
+
+def run(
+    country_code: str,
+    start_date: str,
+    end_date: str,
+    workers: int = 1,
+    db_workers: int | None = None,
+    batch_size: int = 1,
+) -> str:
     """
     ETL weather data for all top airports in a given country and date range.
+    workers>1: lotniska pobierane równolegle (pula wątków, jedna sesja HTTP),
+    zapisy ograniczone do db_workers równoczesnych połączeń (domyślnie min(workers, 4)).
+    batch_size>1: do batch_size lotnisk w jednym wywołaniu Open-Meteo.
     """
     if country_code not in TOP_AIRPORTS:
         return f"Unknown country code: {country_code}"
-    airports = TOP_AIRPORTS[country_code]
-    # For demo, use fixed coordinates for each airport (should be improved)
-    # In real use, fetch lat/lon from DB or config
-    from app.db.connection import get_engine
-    engine = get_engine()
-    results = []
-    with engine.connect() as conn:
-        for iata in airports:
-            # Try to get lat/lon from DB
-            row = conn.execute(
-                text("SELECT latitude, longitude FROM airports WHERE iata_code=:iata"),
-                {"iata": iata}
-            ).fetchone()
-            if not row:
-                results.append(f"{iata}: coordinates not found in DB")
-                continue
-            lat, lon = row
-            try:
-                msg = etl_weather_for_airport(iata, lat, lon, datetime.strptime(start_date, "%Y-%m-%d").date(), datetime.strptime(end_date, "%Y-%m-%d").date())
-                results.append(f"{iata}: {msg}")
-            except Exception as e:
-                results.append(f"{iata}: ERROR {e}")
-    return "\n".join(results)
+    return run_airports(TOP_AIRPORTS[country_code], start_date, end_date, workers, db_workers, batch_size)
+
+def run_airports(
+    airports: list[str],
+    start_date: str,
+    end_date: str,
+    workers: int = 1,
+    db_workers: int | None = None,
+    batch_size: int = 1,
+) -> str:
+    """
+    Jak run(), ale dla dowolnej listy lotnisk (np. odświeżenie całej UE).
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    coords = load_coordinates(airports)
+    added = ensure_partitions_ahead()
+
+    missing = [f"{iata}: coordinates not found in DB" for iata in airports if iata not in coords]
+    locations = [(iata, *coords[iata]) for iata in airports if iata in coords]
+    batches = [locations[i:i + max(1, batch_size)] for i in range(0, len(locations), max(1, batch_size))]
+
+    def one_batch(batch, session=None, db_slots=None) -> list[str]:
+        try:
+            if len(batch) == 1:
+                iata, lat, lon = batch[0]
+                msgs = [etl_weather_for_airport(iata, lat, lon, start, end, session=session, db_slots=db_slots)]
+            else:
+                msgs = etl_weather_for_airports(batch, start, end, session=session, db_slots=db_slots)
+            return [f"{iata}: {msg}" for (iata, _lat, _lon), msg in zip(batch, msgs)]
+        except Exception as e:
+            return [f"{iata}: ERROR {e}" for iata, _lat, _lon in batch]
+
+    if workers <= 1:
+        with make_session(1) as session:
+            results = [one_batch(b, session) for b in batches]
+    else:
+        db_slots = threading.BoundedSemaphore(db_workers or min(workers, 4))
+        with make_session(workers) as session:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(bind(lambda b: one_batch(b, session, db_slots)), batches))
+    notes = [f"partitions added: {', '.join(added)}"] if added else []
+    return "\n".join(notes + missing + [msg for batch_msgs in results for msg in batch_msgs])
 
 if __name__ == "__main__":
-    print(run("PL", "2026-02-01", "2026-02-07"))
\ No newline at end of file
+    print(run("PL", "2026-02-01", "2026-02-07"))
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.etl.fetch_offers_with_fallback import (
+    cached_message,
+    check_date,
+    fetch_one,
+    fresh_requests,
+    result_message,
+    save_many,
+)
+from app.config.settings import AMADEUS_WORKERS, OFFERS_FRESH_TTL_S
+
+def status_of(msg: str) -> str:
+    """
+    Status z komunikatu fetch_offers_with_fallback.run: OK / FALLBACK / CACHED / INVALID_INPUT / ERROR.
+    """
+    return msg.split(":", 1)[0].strip() if msg else "ERROR"
+
+def fetched_message(r: dict) -> str:
+    """
+    Status po odpowiedzi API, przed zapisem (nie liczony w podsumowaniu run_matrix).
+    """
+    return (
+        f"FETCHED: {r['origin']}-{r['dest']} {r['depart_date']} status={r['status']} "
+        f"offers={len(r['offers'])}, pending save"
+    )
+
+def run_matrix(
+    dates: list[str],
+    origins: list[str],
+    dests: list[str],
+    adults: int = 1,
+    fallback_n: int = 10,
+    workers: int = AMADEUS_WORKERS,
+    on_result=None,
+    flush_every: int = 20,
+    fresh_ttl_s: int = OFFERS_FRESH_TTL_S,
+) -> str:
+    """
+    Pobiera oferty dla całej macierzy daty × origins × dests równolegle.
+    Tempo zapytań pilnuje TokenBucket klienta Amadeus (zwalnia po 429).
+    Wyniki zapisywane hurtem (save_many) co flush_every ukończonych zapytań.
+    Trasy ze świeżą odpowiedzią 'ok' (fresh_ttl_s) nie idą do API.
+    on_result(msg): dla każdego zapytania zaraz po odpowiedzi API ("FETCHED: ...,
+    pending save") i ponownie z wynikiem zapisu przy flush - log GUI nie milknie
+    na czas zbierania paczki.
+    """
+    jobs = [(o, ds, d) for d in dates for o in origins for ds in dests]
+    counts: dict[str, int] = {}
+
+    def report(msg: str) -> None:
+        st = status_of(msg)
+        counts[st] = counts.get(st, 0) + 1
+        if on_result is not None:
+            on_result(msg)
+
+    def flush(pending: list[dict]) -> None:
+        try:
+            save_many(pending)
+            msgs = [result_message(r) for r in pending]
+        except Exception as e:
+            msgs = [f"ERROR: {r['origin']}-{r['dest']} {r['depart_date']}: {type(e).__name__}: {e}" for r in pending]
+        for msg in msgs:
+            report(msg)
+        pending.clear()
+
+    valid = []
+    for o, ds, d in jobs:
+        bad = check_date(d)
+        if bad:
+            report(bad)
+        else:
+            valid.append((o, ds, d))
+
+    fresh = fresh_requests([(o, ds, d, int(adults)) for o, ds, d in valid], fresh_ttl_s)
+    for key, cnt in fresh.items():
+        report(cached_message(key, cnt))
+    valid = [(o, ds, d) for o, ds, d in valid if (o, ds, d, int(adults)) not in fresh]
+
+    pending: list[dict] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(fetch_one, o, ds, d, adults, fallback_n) for o, ds, d in valid]
+        for fut in as_completed(futures):
+            r = fut.result()
+            if on_result is not None:
+                on_result(fetched_message(r))
+            pending.append(r)
+            if len(pending) >= flush_every:
+                flush(pending)
+    flush(pending)
+
+    summary = ", ".join(f"{k.lower()}={v}" for k, v in sorted(counts.items()))
+    return f"Offers done: requests={len(jobs)}, {summary}"
@@ -1,23 +1,30 @@
+AIRPORT_PLACEHOLDER_COLS = ["iata_code", "name", "country_code", "latitude", "longitude", "is_active", "source"]
+REQUEST_KEY_COLS = ["origin_iata", "dest_iata", "depart_date", "adults"]
+
 def ensure_airport_placeholder(conn, iata: str) -> None:
     """
     Jeśli lotnisko nie istnieje w airports, dodaje placeholder.
     Dzięki temu FK w amadeus_offer_requests nigdy nie wywali ETL.
+    country_code='' (kolumna NOT NULL; NULL odrzuca tryb strict MySQL i SQLite).
     """
     iata = (iata or "").strip().upper()
     if len(iata) != 3:
         return  # lub rzucić wyjątek invalid_input
 
-    conn.execute(text("""
-        INSERT INTO airports (iata_code, name, country_code, latitude, longitude, is_active, source)
-        VALUES (:iata, 'Unknown airport - placeholder', NULL, NULL, NULL, 0, 'amadeus_placeholder')
-        ON DUPLICATE KEY UPDATE
-          iata_code = VALUES(iata_code)
-    """), {"iata": iata})
-from datetime import datetime, date
+    conn.execute(text(upsert_sql(
+        conn, "airports", AIRPORT_PLACEHOLDER_COLS, ["iata_code"],
+        "VALUES (:iata, 'Unknown airport - placeholder', '', NULL, NULL, 0, 'amadeus_placeholder')",
+        update=[],
+    )), {"iata": iata})
+from datetime import datetime, date, timedelta
 from sqlalchemy import text
 from app.db.connection import get_engine
+from app.db.dialect import upsert_sql
+from app.db.sql_utils import in_params, values_params
 from app.api.amadeus_offers_client import search_offers
 from app.etl.synthetic_offers import generate_synthetic_offers
+from app.etl.report_aggregates import refresh_offers
+from app.config.settings import OFFERS_FRESH_TTL_S
 
 def parse_offer(offer: dict):
     price = offer.get("price", {}).get("total")
@@ -37,29 +44,29 @@ def parse_offer(offer: dict):
         "carrier_code": carrier
     }
 
-def run(origin: str, dest: str, depart_date: str, adults: int = 1, fallback_n: int = 10) -> str:
-    # walidacja daty (żeby nie generować “syntetyków” na złych wejściach)
-    d = datetime.strptime(depart_date, "%Y-%m-%d").date()
-    if d < date.today():
-        return f"INVALID_INPUT: depart_date={depart_date} is in the past"
-
-    engine = get_engine()
-
-    with engine.begin() as conn:
-        ensure_airport_placeholder(conn, origin)
-        ensure_airport_placeholder(conn, dest)
-
-        conn.execute(text("""
-            INSERT INTO amadeus_offer_requests (origin_iata, dest_iata, depart_date, adults, status, offers_cnt)
-            VALUES (:o, :d, :dt, :a, 'fallback', 0)
-            ON DUPLICATE KEY UPDATE request_id=request_id
-        """), {"o": origin, "d": dest, "dt": depart_date, "a": adults})
-
-        request_id = conn.execute(text("""
-            SELECT request_id FROM amadeus_offer_requests
-            WHERE origin_iata=:o AND dest_iata=:d AND depart_date=:dt AND adults=:a
-        """), {"o": origin, "d": dest, "dt": depart_date, "a": adults}).scalar()
+def ensure_airport_placeholders(conn, iatas) -> None:
+    """
+    Jak ensure_airport_placeholder, ale dla wielu lotnisk jednym poleceniem.
+    """
+    codes = sorted({(i or "").strip().upper() for i in iatas} - {""})
+    codes = [c for c in codes if len(c) == 3]
+    if not codes:
+        return
+    rows = [
+        {"iata": c, "name": "Unknown airport - placeholder", "cc": "", "lat": None, "lon": None,
+         "act": 0, "src": "amadeus_placeholder"}
+        for c in codes
+    ]
+    values_sql, params = values_params("a", rows, ["iata", "name", "cc", "lat", "lon", "act", "src"])
+    conn.execute(text(upsert_sql(
+        conn, "airports", AIRPORT_PLACEHOLDER_COLS, ["iata_code"], f"VALUES {values_sql}", update=[],
+    )), params)
 
+def fetch_one(origin: str, dest: str, depart_date: str, adults: int = 1, fallback_n: int = 10) -> dict:
+    """
+    Tylko zapytanie do Amadeus (+ fallback syntetyczny), bez zapisu do DB.
+    Wynik zapisuje save_many().
+    """
     offers_out = []
     status = "ok"
     error_msg = None
@@ -89,32 +96,203 @@ def run(origin: str, dest: str, depart_date: str, adults: int = 1, fallback_n: i
             error_msg = "429 Too Many Requests" if ("429" in msg or "Too Many Requests" in msg) else msg[:350]
             offers_out = generate_synthetic_offers(fallback_n)
 
+    return {
+        "origin": origin,
+        "dest": dest,
+        "depart_date": depart_date,
+        "adults": adults,
+        "status": status,
+        "source": source,
+        "error_msg": error_msg,
+        "offers": offers_out,
+    }
+
+def _request_key(r: dict):
+    return (r["origin"], r["dest"], str(r["depart_date"]), int(r["adults"]))
+
+def resolve_request_ids(conn, reqs: list[dict]) -> dict:
+    """
+    Upsert wierszy amadeus_offer_requests i odczyt ich request_id - hurtem.
+    Zwraca {(origin, dest, 'YYYY-MM-DD', adults): request_id}.
+    """
+    keys = sorted({_request_key(r) for r in reqs})
+    if not keys:
+        return {}
+    ensure_airport_placeholders(conn, [k[0] for k in keys] + [k[1] for k in keys])
+
+    rows = [{"o": o, "d": d, "dt": dt, "a": a, "st": "fallback", "cnt": 0} for o, d, dt, a in keys]
+    values_sql, params = values_params("q", rows, ["o", "d", "dt", "a", "st", "cnt"])
+    conn.execute(text(upsert_sql(
+        conn, "amadeus_offer_requests", REQUEST_KEY_COLS + ["status", "offers_cnt"], REQUEST_KEY_COLS,
+        f"VALUES {values_sql}", update=[],
+    )), params)
+
+    values_sql, params = values_params("k", rows, ["o", "d", "dt", "a"])
+
+    found = conn.execute(text(f"""
+        SELECT request_id, origin_iata, dest_iata, depart_date, adults
+        FROM amadeus_offer_requests
+        WHERE (origin_iata, dest_iata, depart_date, adults) IN ({values_sql})
+    """), params).fetchall()
+    return {(o, d, str(dt), int(a)): rid for rid, o, d, dt, a in found}
+
+def save_many(results: list[dict]) -> None:
+    """
+    Zapis wyników wielu zapytań w jednej transakcji: id hurtem, jeden DELETE,
+    oferty przez executemany (PyMySQL składa wielowierszowe INSERT-y)
+    i jeden upsert statusów.
+    """
+    if not results:
+        return
+    # to samo zapytanie kilka razy w paczce -> zostaje ostatni wynik
+    # (inaczej oferty zapisałyby się podwójnie pod jednym request_id)
+    results = list({_request_key(r): r for r in results}.values())
+    engine = get_engine()
     with engine.begin() as conn:
-        conn.execute(text("DELETE FROM amadeus_flight_offers WHERE request_id=:rid"), {"rid": request_id})
+        ids = resolve_request_ids(conn, results)
+        rids = [ids[_request_key(r)] for r in results]
 
-        for o in offers_out:
-            conn.execute(text("""
-                INSERT INTO amadeus_flight_offers
-                  (request_id, source, price_total, currency, stops, duration_min, carrier_code)
-                VALUES (:rid, :src, :price, :cur, :stops, :dur, :car)
-            """), {
-                "rid": request_id,
-                "src": source,
+        ph, params = in_params("r", rids)
+        conn.execute(text(f"DELETE FROM amadeus_flight_offers WHERE request_id IN ({ph})"), params)
+
+        offers = [
+            {
+                "rid": rid,
+                "src": r["source"],
                 "price": o["price_total"],
                 "cur": o.get("currency", "EUR"),
                 "stops": o["stops"],
                 "dur": o["duration_min"],
                 "car": o.get("carrier_code")
-            })
-
-        conn.execute(text("""
-            UPDATE amadeus_offer_requests
-            SET status=:st, offers_cnt=:cnt, error_msg=:err
-            WHERE request_id=:rid
-        """), {"st": status, "cnt": len(offers_out), "err": error_msg, "rid": request_id})
-
-    if status == "invalid_input":
-        return f"INVALID_INPUT: Amadeus rejected request ({error_msg}) {origin}-{dest} {depart_date}"
-    if source == "synthetic":
-        return f"FALLBACK: saved {len(offers_out)} synthetic offers for {origin}-{dest} {depart_date} (reason={error_msg})"
-    return f"OK: saved {len(offers_out)} amadeus offers for {origin}-{dest} {depart_date}"
+            }
+            for rid, r in zip(rids, results)
+            for o in r["offers"]
+        ]
+        if offers:
+            conn.execute(text("""
+                INSERT INTO amadeus_flight_offers
+                  (request_id, source, price_total, currency, stops, duration_min, carrier_code)
+                VALUES (:rid, :src, :price, :cur, :stops, :dur, :car)
+            """), offers)
+
+        # status wszystkich zapytań jednym upsertem po kluczu uq_req
+        now = datetime.now()
+        rows = [
+            {
+                "o": r["origin"], "d": r["dest"], "dt": r["depart_date"], "a": r["adults"],
+                "st": r["status"], "cnt": len(r["offers"]), "err": r["error_msg"], "at": now,
+            }
+            for r in results
+        ]
+        values_sql, params = values_params("s", rows, ["o", "d", "dt", "a", "st", "cnt", "err", "at"])
+        conn.execute(text(upsert_sql(
+            conn, "amadeus_offer_requests",
+            REQUEST_KEY_COLS + ["status", "offers_cnt", "error_msg", "fetched_at"], REQUEST_KEY_COLS,
+            f"VALUES {values_sql}",
+        )), params)
+
+        # agregaty tylko dla krajów wylotu z paczki i ich dni (ciągłe zakresy),
+        # a nie dla wszystkich krajów w całym przedziale min..max
+        ph, params = in_params("o", sorted({r["origin"] for r in results}))
+        country_of = dict(conn.execute(
+            text(f"SELECT iata_code, country_code FROM airports WHERE iata_code IN ({ph})"), params,
+        ).fetchall())
+        touched: dict[str, set] = {}
+        for r in results:
+            cc = country_of.get(r["origin"])
+            if cc:
+                touched.setdefault(cc, set()).add(datetime.strptime(str(r["depart_date"]), "%Y-%m-%d").date())
+        for cc, days in sorted(touched.items()):
+            for d1, d2 in _day_runs(days):
+                refresh_offers(conn, d1, d2, cc)
+
+def _day_runs(days) -> list[tuple[date, date]]:
+    """
+    Zbiór dni -> ciągłe zakresy [(od, do), ...].
+    """
+    runs = []
+    for d in sorted(days):
+        if runs and d == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = d
+        else:
+            runs.append([d, d])
+    return [(a, b) for a, b in runs]
+
+def result_message(r: dict) -> str:
+    origin, dest, depart_date = r["origin"], r["dest"], r["depart_date"]
+    if r["status"] == "invalid_input":
+        return f"INVALID_INPUT: Amadeus rejected request ({r['error_msg']}) {origin}-{dest} {depart_date}"
+    if r["source"] == "synthetic":
+        return f"FALLBACK: saved {len(r['offers'])} synthetic offers for {origin}-{dest} {depart_date} (reason={r['error_msg']})"
+    return f"OK: saved {len(r['offers'])} amadeus offers for {origin}-{dest} {depart_date}"
+
+def check_date(depart_date: str) -> str | None:
+    # walidacja daty (żeby nie generować “syntetyków” na złych wejściach)
+    d = datetime.strptime(depart_date, "%Y-%m-%d").date()
+    if d < date.today():
+        return f"INVALID_INPUT: depart_date={depart_date} is in the past"
+    return None
+
+def fresh_requests(keys: list[tuple], ttl_s: int = OFFERS_FRESH_TTL_S) -> dict:
+    """
+    Które zapytania (origin, dest, 'YYYY-MM-DD', adults) mają świeżą odpowiedź 'ok'
+    (fetched_at młodsze niż ttl_s)? Zwraca {klucz: offers_cnt}. Jedno zapytanie do DB.
+    """
+    if ttl_s <= 0 or not keys:
+        return {}
+    rows = [{"o": o, "d": d, "dt": dt, "a": a} for o, d, dt, a in keys]
+    values_sql, params = values_params("k", rows, ["o", "d", "dt", "a"])
+    params["since"] = datetime.now() - timedelta(seconds=int(ttl_s))
+    engine = get_engine()
+    with engine.connect() as conn:
+        found = conn.execute(text(f"""
+            SELECT origin_iata, dest_iata, depart_date, adults, offers_cnt
+            FROM amadeus_offer_requests
+            WHERE (origin_iata, dest_iata, depart_date, adults) IN ({values_sql})
+              AND status = 'ok'
+              AND fetched_at >= :since
+        """), params).fetchall()
+    return {(o, d, str(dt), int(a)): cnt for o, d, dt, a, cnt in found}
+
+def cached_message(key: tuple, offers_cnt: int) -> str:
+    origin, dest, depart_date, _adults = key
+    return f"CACHED: {offers_cnt} fresh amadeus offers for {origin}-{dest} {depart_date} (no API call)"
+
+def run_many(requests: list[tuple], fallback_n: int = 10, fresh_ttl_s: int = OFFERS_FRESH_TTL_S) -> list[str]:
+    """
+    requests: lista (origin, dest, depart_date[, adults]).
+    Zapytania ze świeżą odpowiedzią 'ok' (fresh_ttl_s) są pomijane - bez API.
+    Pozostałe: zapytania do Amadeus po kolei, zapis wyników w jednej transakcji.
+    Zwraca komunikaty w kolejności wejścia (jak run()).
+    """
+    messages: list[str | None] = [None] * len(requests)
+    todo = []
+    for i, req in enumerate(requests):
+        origin, dest, depart_date = req[0], req[1], req[2]
+        adults = req[3] if len(req) > 3 else 1
+        bad = check_date(depart_date)
+        if bad:
+            messages[i] = bad
+            continue
+        todo.append((i, (origin, dest, depart_date, int(adults))))
+
+    fresh = fresh_requests([k for _i, k in todo], fresh_ttl_s)
+
+    results = []
+    order = []
+    for i, (origin, dest, depart_date, adults) in todo:
+        key = (origin, dest, depart_date, adults)
+        if key in fresh:
+            messages[i] = cached_message(key, fresh[key])
+            continue
+        results.append(fetch_one(origin, dest, depart_date, adults=adults, fallback_n=fallback_n))
+        order.append(i)
+
+    save_many(results)
+    for i, r in zip(order, results):
+        messages[i] = result_message(r)
+    return messages
+
+def run(origin: str, dest: str, depart_date: str, adults: int = 1, fallback_n: int = 10,
+        fresh_ttl_s: int = OFFERS_FRESH_TTL_S) -> str:
+    return run_many([(origin, dest, depart_date, adults)], fallback_n=fallback_n, fresh_ttl_s=fresh_ttl_s)[0]
@@ -2,18 +2,14 @@ import random
 from datetime import datetime, timedelta
 from sqlalchemy import text
 from app.db.connection import get_engine
+from app.db.sql_utils import chunks, in_params, insert_many_ids
+from app.etl.report_aggregates import refresh_ops
 from app.config.top_airports import TOP_AIRPORTS
 
 FIRST_NAMES = ["Jan","Adam","Piotr","Anna","Maria","Katarzyna","Julia","Paweł","Tomasz","Michał"]
 LAST_NAMES = ["Kowalski","Nowak","Wiśniewski","Wójcik","Kowalczyk","Kamiński","Lewandowski","Zieliński","Szymański"]
 
-def run(country_code: str, start_date: str, end_date: str, flights_per_day: int = 10):
-    engine = get_engine()
-
-    origins = TOP_AIRPORTS.get(country_code, [])[:3]
-    if len(origins) < 1:
-        return f"EMPTY: no TOP airports for {country_code}"
-
+def _pick_dests(country_code: str) -> list[str]:
     # weź kilka destów z innych krajów
     all_keys = list(TOP_AIRPORTS.keys())
     random.shuffle(all_keys)
@@ -23,34 +19,89 @@ def run(country_code: str, start_date: str, end_date: str, flights_per_day: int
             dests.extend(TOP_AIRPORTS[cc][:2])
         if len(dests) >= 6:
             break
+    return dests
+
+def _random_flight(day, origins: list[str], dests: list[str]) -> dict:
+    dep_time = datetime.combine(day, datetime.min.time()) + timedelta(hours=random.randint(6, 20), minutes=random.choice([0,15,30,45]))
+    duration = timedelta(minutes=random.randint(80, 180))
+    return {
+        "dep_iata": random.choice(origins),
+        "arr_iata": random.choice(dests),
+        "sched_dep": dep_time,
+        "sched_arr": dep_time + duration,
+        "status": "scheduled",
+        "delay_min": 0,
+        "seats": random.choice([160,180,200]),
+    }
+
+def _random_passenger(country_code: str) -> dict:
+    return {
+        "first_name": random.choice(FIRST_NAMES),
+        "last_name": random.choice(LAST_NAMES),
+        "nationality": country_code,
+    }
+
+def run(
+    country_code: str,
+    start_date: str,
+    end_date: str,
+    flights_per_day: int = 10,
+    bulk: bool = False,
+    passenger_pool: int = 0,
+    chunk_flights: int = 50,
+    skip_existing: bool = False,
+):
+    """
+    bulk=False: klasyczny tryb (INSERT per pasażer/bilet, jedna transakcja).
+    bulk=True: wiersze budowane w pamięci, zapis wielowierszowymi INSERT-ami
+    i commit co chunk_flights lotów. passenger_pool>0 (tylko bulk) - bilety
+    losują pasażerów z puli tej wielkości zamiast tworzyć nowego per bilet.
+    skip_existing=True: dni, w których lotniska kraju mają już loty, są pomijane -
+    ponowne uruchomienie (np. pipeline) nie dubluje rozkładu.
+    """
+    origins = TOP_AIRPORTS.get(country_code, [])[:3]
+    if len(origins) < 1:
+        return f"EMPTY: no TOP airports for {country_code}"
+
+    dests = _pick_dests(country_code)
 
     d1 = datetime.strptime(start_date, "%Y-%m-%d")
     d2 = datetime.strptime(end_date, "%Y-%m-%d")
-    days = (d2.date() - d1.date()).days + 1
+    days = [(d1 + timedelta(days=i)).date() for i in range((d2.date() - d1.date()).days + 1)]
+
+    skipped = ""
+    if skip_existing:
+        existing = _existing_days(origins, d1.date(), d2.date())
+        days = [d for d in days if d.isoformat() not in existing]
+        skipped = f", skipped_days={len(existing)}"
+        if not days:
+            return f"OK: flights already generated for {country_code} {start_date}..{end_date}{skipped}"
+
+    if bulk:
+        return _run_bulk(country_code, days, flights_per_day, origins, dests, passenger_pool, chunk_flights) + skipped
+
+    engine = get_engine()
 
     created_flights = 0
     created_tickets = 0
 
     with engine.begin() as conn:
-        for di in range(days):
-            day = (d1 + timedelta(days=di)).date()
+        for day in days:
             for _ in range(flights_per_day):
-                dep = random.choice(origins)
-                arr = random.choice(dests)
-                dep_time = datetime.combine(day, datetime.min.time()) + timedelta(hours=random.randint(6, 20), minutes=random.choice([0,15,30,45]))
-                duration = timedelta(minutes=random.randint(80, 180))
-                arr_time = dep_time + duration
-                seats = random.choice([160,180,200])
+                fl = _random_flight(day, origins, dests)
+                seats = fl["seats"]
 
                 res = conn.execute(text("""
                     INSERT INTO flights (dep_iata, arr_iata, sched_dep, sched_arr, status, delay_min, seats)
                     VALUES (:dep, :arr, :sd, :sa, 'scheduled', 0, :seats)
-                """), {"dep": dep, "arr": arr, "sd": dep_time, "sa": arr_time, "seats": seats})
+                """), {"dep": fl["dep_iata"], "arr": fl["arr_iata"], "sd": fl["sched_dep"], "sa": fl["sched_arr"], "seats": seats})
                 flight_id = res.lastrowid
                 created_flights += 1
 
                 # pasażerowie i bilety
-                booking_id = conn.execute(text("INSERT INTO bookings () VALUES ()")).lastrowid
+                booking_id = conn.execute(
+                    text("INSERT INTO bookings (created_at) VALUES (:ts)"), {"ts": datetime.now()}
+                ).lastrowid
 
                 load = random.uniform(0.55, 0.92)
                 pax = int(seats * load)
@@ -72,7 +123,97 @@ def run(country_code: str, start_date: str, end_date: str, flights_per_day: int
                     """), {"b": booking_id, "p": pid, "f": flight_id, "price": price, "cabin": cabin})
                     created_tickets += 1
 
-    return f"OK: flights={created_flights}, tickets={created_tickets}"
+        refresh_ops(conn, country_code, d1.date(), d2.date())
+
+    return f"OK: flights={created_flights}, tickets={created_tickets}{skipped}"
+
+def _existing_days(origins: list[str], d1, d2) -> set[str]:
+    """
+    Dni ('YYYY-MM-DD') z zakresu, w których z origins odlatują już jakieś loty.
+    """
+    ph, params = in_params("o", origins)
+    with get_engine().connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT DISTINCT dep_day FROM flights
+            WHERE dep_iata IN ({ph}) AND dep_day BETWEEN :d1 AND :d2
+        """), {**params, "d1": d1, "d2": d2}).fetchall()
+    return {str(r[0])[:10] for r in rows}
+
+FLIGHT_COLS = ["dep_iata", "arr_iata", "sched_dep", "sched_arr", "status", "delay_min", "seats"]
+PASSENGER_COLS = ["first_name", "last_name", "nationality"]
+TICKET_COLS = ["booking_id", "passenger_id", "flight_id", "price_eur", "cabin"]
+
+def _run_bulk(country_code, days, flights_per_day, origins, dests, passenger_pool, chunk_flights):
+    engine = get_engine()
+
+    planned = []
+    for day in days:
+        for _ in range(flights_per_day):
+            planned.append(_random_flight(day, origins, dests))
+
+    pool_ids: list[int] = []
+    if passenger_pool > 0:
+        with engine.begin() as conn:
+            pool_ids = insert_many_ids(
+                conn, "passengers", PASSENGER_COLS,
+                [_random_passenger(country_code) for _ in range(passenger_pool)], "passenger_id",
+            )
+
+    created_flights = 0
+    created_tickets = 0
+    created_passengers = len(pool_ids)
+
+    # commit co chunk_flights lotów - blokady na flights/tickets trzymane krótko
+    for part in chunks(planned, max(1, chunk_flights)):
+        loads = [int(fl["seats"] * random.uniform(0.55, 0.92)) for fl in part]
+
+        with engine.begin() as conn:
+            flight_ids = insert_many_ids(conn, "flights", FLIGHT_COLS, part, "flight_id")
+            now = datetime.now()
+            booking_ids = insert_many_ids(conn, "bookings", ["created_at"], [{"created_at": now} for _ in part], "booking_id")
+
+            if pool_ids:
+                pax_ids = []
+                for pax in loads:
+                    if pax <= len(pool_ids):
+                        pax_ids.extend(random.sample(pool_ids, pax))
+                    else:
+                        pax_ids.extend(random.choices(pool_ids, k=pax))
+            else:
+                pax_ids = insert_many_ids(
+                    conn, "passengers", PASSENGER_COLS,
+                    [_random_passenger(country_code) for _ in range(sum(loads))], "passenger_id",
+                )
+                created_passengers += len(pax_ids)
+
+            tickets = []
+            pi = 0
+            for flight_id, booking_id, pax in zip(flight_ids, booking_ids, loads):
+                for _p in range(pax):
+                    tickets.append({
+                        "b": booking_id,
+                        "p": pax_ids[pi],
+                        "f": flight_id,
+                        "price": round(random.uniform(50, 220), 2),
+                        "cabin": "BUSINESS" if random.random() < 0.08 else "ECONOMY",
+                    })
+                    pi += 1
+
+            # executemany - PyMySQL składa to w wielowierszowe INSERT-y
+            if tickets:
+                conn.execute(text("""
+                    INSERT INTO tickets (booking_id, passenger_id, flight_id, price_eur, cabin)
+                    VALUES (:b, :p, :f, :price, :cabin)
+                """), tickets)
+
+        created_flights += len(flight_ids)
+        created_tickets += len(tickets)
+
+    with engine.begin() as conn:
+        if days:
+            refresh_ops(conn, country_code, min(days), max(days))
+
+    return f"OK (bulk): flights={created_flights}, tickets={created_tickets}, passengers={created_passengers}"
 
 if __name__ == "__main__":
     print(run("PL","2026-02-01","2026-02-03", flights_per_day=5))
@@ -1,48 +1,109 @@
 from pathlib import Path
 import csv
+import gzip
+import hashlib
 from sqlalchemy import text
 from app.db.connection import get_engine
+from app.db.sql_utils import chunks, in_params, values_params
+from app.db.data_version import bump
+from app.db.dialect import upsert_sql
 from app.config.eu_codes import EU_COUNTRY_CODES
 
 DATA_PATH = Path("airports.csv")
 
-def run():
-    if not DATA_PATH.exists():
-        raise RuntimeError("Brak pliku airports.csv")
+AIRPORT_COLS = ["iata", "name", "cc", "lat", "lon", "h"]
+DB_COLS = ["iata_code", "name", "country_code", "latitude", "longitude", "content_hash"]
+
+def _resolve_path(path) -> Path:
+    if path is not None:
+        return Path(path)
+    gz = DATA_PATH.with_name(DATA_PATH.name + ".gz")
+    if not DATA_PATH.exists() and gz.exists():
+        return gz
+    return DATA_PATH
+
+def _open_csv(path: Path):
+    if path.suffix.lower() == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return path.open("r", encoding="utf-8", newline="")
+
+def _parse(row: dict) -> dict | None:
+    iata = (row.get("iata_code") or "").strip().upper()
+    country = (row.get("iso_country") or "").strip().upper()
+    if not iata or len(iata) != 3:
+        return None
+    if country not in EU_COUNTRY_CODES:
+        return None
+
+    name = (row.get("name") or "").strip()[:200]
+    lat = row.get("latitude_deg")
+    lon = row.get("longitude_deg")
+    lat = float(lat) if lat else None
+    lon = float(lon) if lon else None
+
+    h = hashlib.sha1(f"{name}|{country}|{lat!r}|{lon!r}".encode("utf-8")).hexdigest()
+    return {"iata": iata, "name": name, "cc": country, "lat": lat, "lon": lon, "h": h}
+
+def _iter_chunks(reader, chunk_size: int):
+    """
+    Wiersze UE w paczkach po chunk_size (w paczce ostatni wiersz danego IATA wygrywa).
+    """
+    part: dict[str, dict] = {}
+    for row in reader:
+        a = _parse(row)
+        if a is None:
+            continue
+        part[a["iata"]] = a
+        if len(part) >= chunk_size:
+            yield list(part.values())
+            part = {}
+    if part:
+        yield list(part.values())
+
+def run(path=None, chunk_size: int = 1000):
+    """
+    Strumieniowy import OurAirports (airports.csv albo airports.csv.gz).
+    Porównuje skrót treści wiersza z airports.content_hash i wysyła
+    wielowierszowym upsertem tylko nowe/zmienione lotniska.
+    """
+    src = _resolve_path(path)
+    if not src.exists():
+        raise RuntimeError(f"Brak pliku {src}")
 
     engine = get_engine()
-    inserted = 0
+    new = updated = unchanged = 0
 
-    with DATA_PATH.open("r", encoding="utf-8", newline="") as f:
+    with _open_csv(src) as f:
         reader = csv.DictReader(f)
-        with engine.begin() as conn:
-            for row in reader:
-                iata = (row.get("iata_code") or "").strip().upper()
-                country = (row.get("iso_country") or "").strip().upper()
-                if not iata or len(iata) != 3:
-                    continue
-                if country not in EU_COUNTRY_CODES:
-                    continue
-
-                name = (row.get("name") or "").strip()[:200]
-                lat = row.get("latitude_deg")
-                lon = row.get("longitude_deg")
-                lat = float(lat) if lat else None
-                lon = float(lon) if lon else None
-
-                conn.execute(text("""
-                    INSERT INTO airports (iata_code, name, country_code, latitude, longitude, is_active, source)
-                    VALUES (:iata, :name, :cc, :lat, :lon, 1, 'ourairports')
-                    ON DUPLICATE KEY UPDATE
-                      name=VALUES(name),
-                      country_code=VALUES(country_code),
-                      latitude=VALUES(latitude),
-                      longitude=VALUES(longitude),
-                      is_active=1
-                """), {"iata": iata, "name": name, "cc": country, "lat": lat, "lon": lon})
-                inserted += 1
-
-    return f"OK: imported/updated {inserted} airport rows"
+        for part in _iter_chunks(reader, chunk_size):
+            with engine.begin() as conn:
+                ph, params = in_params("i", [a["iata"] for a in part])
+                stored = dict(conn.execute(
+                    text(f"SELECT iata_code, content_hash FROM airports WHERE iata_code IN ({ph})"),
+                    params,
+                ).fetchall())
+
+                changed = []
+                for a in part:
+                    if a["iata"] not in stored:
+                        new += 1
+                        changed.append(a)
+                    elif stored[a["iata"]] != a["h"]:
+                        updated += 1
+                        changed.append(a)
+                    else:
+                        unchanged += 1
+
+                for batch in chunks(changed, 500):
+                    values_sql, vparams = values_params("a", batch, AIRPORT_COLS)
+                    conn.execute(text(upsert_sql(
+                        conn, "airports", DB_COLS, ["iata_code"], f"VALUES {values_sql}",
+                        extra={"is_active": "1"},
+                    )), vparams)
+                if changed:
+                    bump(conn, "airports")
+
+    return f"OK: airports new={new}, updated={updated}, unchanged={unchanged}"
 
 if __name__ == "__main__":
-    print(run())
\ No newline at end of file
+    print(run())
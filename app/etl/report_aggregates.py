@@ -0,0 +1,77 @@
+from datetime import date
+from sqlalchemy import text
+from app.db.data_version import bump
+from app.db.dialect import upsert_sql
+
+# Przeliczenie agregatów dla zakresu dni: DELETE + INSERT ... SELECT tylko dla
+# tych dni, więc koszt zależy od liczby zmienionych dni, a nie od całej historii.
+# Wołane w transakcji ETL, który zmienił dane źródłowe.
+
+# f.dep_day = DATE(f.sched_dep) jako kolumna generowana (sql/008).
+# *_AGG_SQL to same SELECT-y; upsert dokleja ops_upsert_sql/offers_upsert_sql wg dialektu.
+OPS_AGG_SQL = """
+    SELECT a.country_code, f.dep_day, COALESCE(r.risk_level,'LOW'), f.status, COUNT(*)
+    FROM airports a
+    JOIN flights f
+      ON f.dep_iata = a.iata_code
+     AND f.dep_day BETWEEN :d1 AND :d2
+    LEFT JOIN weather_risk_daily r
+      ON r.iata_code=f.dep_iata
+     AND r.source='forecast'
+     AND r.day=f.dep_day
+    WHERE a.country_code=:cc
+    GROUP BY a.country_code, f.dep_day, COALESCE(r.risk_level,'LOW'), f.status
+"""
+
+OFFERS_AGG_SQL = """
+    SELECT a.country_code, req.depart_date, COALESCE(r.risk_level,'LOW'), o.source, COUNT(*), SUM(o.price_total)
+    FROM amadeus_offer_requests req
+    JOIN amadeus_flight_offers o ON o.request_id = req.request_id
+    JOIN airports a ON a.iata_code = req.origin_iata
+    LEFT JOIN weather_risk_daily r
+      ON r.iata_code = req.origin_iata
+     AND r.source = 'forecast'
+     AND r.day = req.depart_date
+    WHERE req.depart_date BETWEEN :d1 AND :d2
+      AND a.country_code <> ''
+      AND (:cc IS NULL OR a.country_code=:cc)
+    GROUP BY a.country_code, req.depart_date, COALESCE(r.risk_level,'LOW'), o.source
+"""
+
+def ops_upsert_sql(conn) -> str:
+    return upsert_sql(
+        conn, "agg_ops_risk_daily", ["country_code", "day", "risk_level", "status", "flights_cnt"],
+        ["country_code", "day", "risk_level", "status"], OPS_AGG_SQL,
+    )
+
+def offers_upsert_sql(conn) -> str:
+    return upsert_sql(
+        conn, "agg_offers_risk_daily", ["country_code", "day", "risk_level", "source", "offers_cnt", "price_sum"],
+        ["country_code", "day", "risk_level", "source"], OFFERS_AGG_SQL,
+    )
+
+def refresh_ops(conn, country_code: str, day_from: date, day_to: date) -> None:
+    """
+    agg_ops_risk_daily dla kraju wylotu i dni [day_from, day_to].
+    """
+    params = {"cc": country_code, "d1": day_from, "d2": day_to}
+    conn.execute(text("""
+        DELETE FROM agg_ops_risk_daily
+        WHERE country_code=:cc AND day BETWEEN :d1 AND :d2
+    """), params)
+    conn.execute(text(ops_upsert_sql(conn)), params)
+    bump(conn, "agg_ops_risk_daily")
+
+def refresh_offers(conn, day_from: date, day_to: date, country_code: str | None = None) -> None:
+    """
+    agg_offers_risk_daily dla dni wylotu [day_from, day_to]
+    (jednego kraju wylotu albo wszystkich, gdy country_code=None).
+    """
+    params = {"cc": country_code, "d1": day_from, "d2": day_to}
+    conn.execute(text("""
+        DELETE FROM agg_offers_risk_daily
+        WHERE day BETWEEN :d1 AND :d2
+          AND (:cc IS NULL OR country_code=:cc)
+    """), params)
+    conn.execute(text(offers_upsert_sql(conn)), params)
+    bump(conn, "agg_offers_risk_daily")
@@ -0,0 +1,186 @@
+import re
+from datetime import date
+from sqlalchemy import text
+from app.db.connection import get_engine
+from app.db.data_version import bump
+from app.db.dialect import is_mysql, upsert_sql
+from app.config.settings import WEATHER_HOURLY_RETENTION_MONTHS, WEATHER_PARTITIONS_AHEAD
+
+# Partycje weather_hourly (sql/009): p_hist, pYYYYMM (dane z miesiąca YYYY-MM), pmax.
+PARTITION_NAME_RE = re.compile(r"^p(_hist|\d{6})$")
+
+PARTITIONS_SQL = """
+    SELECT PARTITION_NAME,
+           IF(PARTITION_DESCRIPTION = 'MAXVALUE', NULL, FROM_DAYS(PARTITION_DESCRIPTION)) AS upper_bound
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'weather_hourly'
+      AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+DAILY_COLS = [
+    "iata_code", "day", "source", "hours_cnt", "synthetic_hours", "temp_min_c", "temp_avg_c", "temp_max_c",
+    "wind_avg_ms", "wind_max_ms", "precip_sum_mm", "vis_min_m",
+]
+
+ROLLUP_SQL = """
+    INSERT INTO weather_daily
+      (iata_code, day, source, hours_cnt, synthetic_hours, temp_min_c, temp_avg_c, temp_max_c,
+       wind_avg_ms, wind_max_ms, precip_sum_mm, vis_min_m)
+    SELECT iata_code, day, source, COUNT(*), SUM(is_synthetic),
+           MIN(temperature_c), AVG(temperature_c), MAX(temperature_c),
+           AVG(windspeed_ms), MAX(windspeed_ms),
+           SUM(precipitation_mm), MIN(visibility_m)
+    FROM weather_hourly PARTITION ({partition})
+    GROUP BY iata_code, source, day
+    ON DUPLICATE KEY UPDATE
+      hours_cnt=VALUES(hours_cnt), synthetic_hours=VALUES(synthetic_hours),
+      temp_min_c=VALUES(temp_min_c), temp_avg_c=VALUES(temp_avg_c), temp_max_c=VALUES(temp_max_c),
+      wind_avg_ms=VALUES(wind_avg_ms), wind_max_ms=VALUES(wind_max_ms),
+      precip_sum_mm=VALUES(precip_sum_mm), vis_min_m=VALUES(vis_min_m)
+"""
+
+# backend bez partycji (SQLite): ten sam rollup po zakresie dat
+ROLLUP_RANGE_SQL = """
+    SELECT iata_code, day, source, COUNT(*), SUM(is_synthetic),
+           MIN(temperature_c), AVG(temperature_c), MAX(temperature_c),
+           AVG(windspeed_ms), MAX(windspeed_ms),
+           SUM(precipitation_mm), MIN(visibility_m)
+    FROM weather_hourly
+    WHERE dt_utc < :cutoff
+    GROUP BY iata_code, source, day
+"""
+
+def add_months(d: date, n: int) -> date:
+    m = d.year * 12 + (d.month - 1) + n
+    return date(m // 12, m % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"p{month.year}{month.month:02d}"
+
+def list_partitions(conn) -> list[tuple[str, date | None]]:
+    """
+    [(nazwa, górna granica wyłączna)], pmax ma granicę None.
+    """
+    rows = conn.execute(text(PARTITIONS_SQL)).fetchall()
+    if not rows:
+        raise RuntimeError("weather_hourly nie jest partycjonowane - uruchom sql/009_weather_partitioning.sql")
+    return [(name, bound) for name, bound in rows]
+
+def expired_partitions(parts: list[tuple[str, date | None]], keep_months: int, today: date) -> list[str]:
+    """
+    Partycje, których wszystkie dane są starsze niż keep_months pełnych miesięcy.
+    """
+    cutoff = add_months(today.replace(day=1), -keep_months)
+    return [name for name, bound in parts if bound is not None and bound <= cutoff]
+
+def rollup_partition(conn, name: str) -> int:
+    """
+    Dzienne agregaty z jednej partycji godzinowej do weather_daily (idempotentne).
+    """
+    if not PARTITION_NAME_RE.match(name):
+        raise ValueError(f"Unexpected partition name: {name}")
+    return conn.execute(text(ROLLUP_SQL.format(partition=name))).rowcount
+
+def ensure_partitions(conn, months_ahead: int, today: date) -> list[str]:
+    """
+    Dzieli pmax na miesięczne partycje do (bieżący miesiąc + months_ahead) włącznie.
+    pmax trzymana pusta - REORGANIZE nie musi wtedy przenosić danych.
+    """
+    parts = list_partitions(conn)
+    bounds = [b for _, b in parts if b is not None]
+    start = max(bounds) if bounds else today.replace(day=1)
+    target = add_months(today.replace(day=1), months_ahead + 1)
+
+    new = []
+    month = start
+    while month < target:
+        new.append((partition_name(month), add_months(month, 1)))
+        month = add_months(month, 1)
+    if not new:
+        return []
+
+    defs = ",\n".join(
+        f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{bound.isoformat()}'))" for name, bound in new
+    )
+    conn.execute(text(f"""
+        ALTER TABLE weather_hourly REORGANIZE PARTITION pmax INTO (
+          {defs},
+          PARTITION pmax VALUES LESS THAN MAXVALUE
+        )
+    """))
+    return [name for name, _ in new]
+
+def ensure_partitions_ahead(months_ahead: int = WEATHER_PARTITIONS_AHEAD, today: date | None = None) -> list[str]:
+    """
+    Sam krok 3) retencji - wołany przed zapisem pogody (etl_weather_country), żeby
+    nowe godziny nie lądowały w pmax, gdy nikt nie uruchamia pełnej retencji.
+    Poza MySQL albo bez partycji (przed sql/009): nic nie robi.
+    Zwykle tylko odczyt information_schema - ALTER tylko gdy brakuje partycji.
+    """
+    today = today or date.today()
+    with get_engine().connect() as conn:
+        if not is_mysql(conn) or conn.execute(text(PARTITIONS_SQL)).first() is None:
+            conn.rollback()
+            return []
+        added = ensure_partitions(conn, months_ahead, today)
+        conn.commit()
+    return added
+
+def run(
+    keep_months: int = WEATHER_HOURLY_RETENTION_MONTHS,
+    months_ahead: int = WEATHER_PARTITIONS_AHEAD,
+    today: date | None = None,
+) -> str:
+    """
+    Retencja weather_hourly:
+      1) partycje starsze niż keep_months -> rollup do weather_daily (commit),
+      2) DROP PARTITION (natychmiastowe, bez DELETE wiersz po wierszu),
+      3) nowe partycje miesięczne na months_ahead miesięcy do przodu.
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be >= 1")
+    today = today or date.today()
+    engine = get_engine()
+
+    with engine.connect() as conn:
+        if not is_mysql(conn):
+            conn.rollback()
+            return _run_delete(engine, keep_months, today)
+        expired = expired_partitions(list_partitions(conn), keep_months, today)
+
+    # rollup zatwierdzony PRZED DROP - DDL w MySQL robi niejawny commit
+    rolled = 0
+    for name in expired:
+        with engine.begin() as conn:
+            rolled += rollup_partition(conn, name)
+            bump(conn, "weather_daily")
+
+    with engine.connect() as conn:
+        if expired:
+            conn.execute(text(f"ALTER TABLE weather_hourly DROP PARTITION {', '.join(expired)}"))
+        added = ensure_partitions(conn, months_ahead, today)
+        conn.commit()
+
+    return (
+        f"OK: weather retention keep={keep_months}m: rollup rows={rolled}, "
+        f"dropped=[{', '.join(expired)}], added=[{', '.join(added)}]"
+    )
+
+def _run_delete(engine, keep_months: int, today: date) -> str:
+    """
+    Retencja bez partycji: rollup wierszy sprzed granicy i DELETE w jednej transakcji.
+    """
+    cutoff = add_months(today.replace(day=1), -keep_months)
+    with engine.begin() as conn:
+        sql = upsert_sql(conn, "weather_daily", DAILY_COLS, ["iata_code", "day", "source"], ROLLUP_RANGE_SQL)
+        rolled = conn.execute(text(sql), {"cutoff": cutoff}).rowcount
+        deleted = conn.execute(text("DELETE FROM weather_hourly WHERE dt_utc < :cutoff"), {"cutoff": cutoff}).rowcount
+        if deleted:
+            bump(conn, "weather_daily")
+
+    return f"OK: weather retention keep={keep_months}m (delete): rollup rows={rolled}, deleted={deleted}"
+
+if __name__ == "__main__":
+    print(run())
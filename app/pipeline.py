@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from app.config.eu_codes import EU_COUNTRY_CODES
+from app.config.settings import WEATHER_BATCH_SIZE, WEATHER_DB_WORKERS, WEATHER_WORKERS
+from app.config.top_airports import TOP_AIRPORTS
+from app.db.metrics import track_run
+
+# Graf etapów (per kraj CC):
+#   import -> retention -> weather:CC -> risk:CC ─┐
+#   import -> ops:CC ─────────────────────────────┴-> impact:CC ─┐
+#   import -> offers:CC (opcjonalnie, --offers-to) ───────────────┴-> reports (wszystkie kraje naraz)
+# retention (raz): rollup + DROP starych partycji weather_hourly i nowe partycje
+# na WEATHER_PARTITIONS_AHEAD miesięcy - przed zapisami pogody, bez wyścigu z nimi
+STAGES = ["import", "retention", "weather", "risk", "ops", "impact", "offers", "reports"]
+
+@dataclass
+class Task:
+    name: str
+    stage: str
+    fn: object
+    deps: list[str] = field(default_factory=list)
+    # True: startuje po zakończeniu zależności niezależnie od ich wyniku
+    # (raporty mają powstać dla krajów, którym się udało)
+    after_any: bool = False
+    status: str = "pending"  # pending / running / ok / failed / skipped
+    seconds: float = 0.0
+    message: str = ""
+    # metryki SQL przebiegu (app/db/metrics.py): round trips, wiersze, czas w bazie
+    sql: dict = field(default_factory=dict)
+
+# etapy ETL zgłaszają część błędów w komunikacie zamiast wyjątkiem:
+# weather "WAW: ERROR ...", offers "ERROR: ..." / podsumowanie "error=N", nieznany kraj
+ERROR_RE = re.compile(r"(?:^|: )ERROR\b|\berror=[1-9]|^Unknown country code")
+
+def message_error(message: str) -> str:
+    """
+    Pierwsza linia komunikatu etapu zgłaszająca błąd albo "" (etap udany).
+    """
+    for line in (message or "").splitlines():
+        if ERROR_RE.search(line):
+            return line
+    return ""
+
+def dates_between(start: str, end: str) -> list[str]:
+    s = datetime.strptime(start, "%Y-%m-%d").date()
+    e = datetime.strptime(end, "%Y-%m-%d").date()
+    return [(s + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((e - s).days + 1)]
+
+def build_tasks(
+    countries: list[str],
+    start: str,
+    end: str,
+    offers_to: str | None = None,
+    skip: set[str] = frozenset(),
+    flights_per_day: int = 6,
+) -> dict[str, Task]:
+    """
+    Zadania jak w GUI (te same tryby: risk 'server', ops bulk, impact 'set').
+    ops pomija dni, które mają już loty - ponowny przebieg nie dubluje rozkładu.
+    Etapy z skip są pomijane - zależne od nich zadania traktują je jak wykonane.
+    """
+    # importy w środku: moduł da się wczytać (np. --help) bez sterowników DB
+    from app.etl.import_airports_ourairports import run as etl_import_airports
+    from app.etl.etl_weather_country import run as etl_weather
+    from app.etl.weather_retention import run as etl_retention
+    from app.etl.build_weather_risk_daily import run as etl_risk
+    from app.etl.generate_operations import run as etl_ops
+    from app.etl.apply_weather_impact import run as etl_impact
+    from app.etl.fetch_offers_batch import run_matrix as etl_offers_matrix
+    from app.reports.batch import run_batch
+
+    tasks: dict[str, Task] = {}
+
+    def add(name: str, stage: str, fn, deps: list[str], after_any: bool = False) -> None:
+        if stage in skip:
+            return
+        tasks[name] = Task(name, stage, fn, [d for d in deps if d in tasks], after_any)
+
+    add("import", "import", etl_import_airports, [])
+    add("retention", "retention", etl_retention, ["import"])
+    for cc in countries:
+        add(f"weather:{cc}", "weather", lambda cc=cc: etl_weather(
+            cc, start, end, workers=WEATHER_WORKERS, db_workers=WEATHER_DB_WORKERS, batch_size=WEATHER_BATCH_SIZE,
+        ), ["import", "retention"])
+        add(f"risk:{cc}", "risk", lambda cc=cc: etl_risk(cc, mode="server"), [f"weather:{cc}"])
+        add(f"ops:{cc}", "ops", lambda cc=cc: etl_ops(
+            cc, start, end, flights_per_day=flights_per_day, bulk=True, skip_existing=True,
+        ), ["import"])
+        add(f"impact:{cc}", "impact", lambda cc=cc: etl_impact(cc, mode="set"), [f"risk:{cc}", f"ops:{cc}"])
+
+        origins = TOP_AIRPORTS.get(cc, [])[:2]
+        dests = TOP_AIRPORTS.get(offers_to or "", [])[:2]
+        if offers_to and cc != offers_to and origins and dests:
+            add(f"offers:{cc}", "offers", lambda o=origins, d=dests: etl_offers_matrix(
+                dates_between(start, end), o, d, adults=1, fallback_n=10,
+            ), ["import"])
+
+    per_country = [n for n, t in tasks.items() if t.stage in ("risk", "impact", "offers")]
+    add("reports", "reports", lambda: run_batch(countries=countries), per_country, after_any=True)
+    return tasks
+
+def run_tasks(
+    tasks: dict[str, Task],
+    workers: int,
+    limits: dict[str, int] | None = None,
+    on_event=print,
+) -> dict[str, Task]:
+    """
+    Wykonuje graf w puli wątków: zadanie startuje, gdy wszystkie zależności
+    są 'ok' (after_any: gdy są zakończone); porażka (wyjątek albo błąd
+    w komunikacie - message_error) oznacza zależne zadania jako 'skipped'.
+    Harmonogram działa w wątku wywołującym.
+    limits: maks. równoległych zadań danego etapu (np. {"weather": 2}).
+    """
+    limits = limits or {}
+    running_per_stage: dict[str, int] = {}
+
+    def execute(task: Task) -> Task:
+        t0 = time.perf_counter()
+        with track_run(task.name) as m:
+            try:
+                task.message = str(task.fn())
+                err = message_error(task.message)
+                task.status = "failed" if err else "ok"
+                if err:
+                    m.ok, m.error = False, err
+            except Exception as e:
+                task.message = f"{type(e).__name__}: {e}"
+                task.status = "failed"
+                m.ok, m.error = False, task.message
+        task.seconds = time.perf_counter() - t0
+        task.sql = {"statements": m.statements, "rows": m.rows, "db_ms": round(m.db_ms, 1)}
+        return task
+
+    def ready(task: Task) -> bool:
+        if task.status != "pending":
+            return False
+        finished = ("ok",) if not task.after_any else ("ok", "failed", "skipped")
+        if any(tasks[d].status not in finished for d in task.deps):
+            return False
+        limit = limits.get(task.stage)
+        return limit is None or running_per_stage.get(task.stage, 0) < limit
+
+    def skip_dependents(failed: str) -> None:
+        for t in tasks.values():
+            if t.status == "pending" and not t.after_any and failed in t.deps:
+                t.status = "skipped"
+                t.message = f"dependency {failed} did not succeed"
+                on_event(f"[SKIP] {t.name}: {t.message}")
+                skip_dependents(t.name)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pipeline") as pool:
+        inflight = {}
+        while True:
+            for t in tasks.values():
+                if len(inflight) >= max(1, workers):
+                    break
+                if ready(t):
+                    t.status = "running"
+                    running_per_stage[t.stage] = running_per_stage.get(t.stage, 0) + 1
+                    inflight[pool.submit(execute, t)] = t
+                    on_event(f"[START] {t.name}")
+            if not inflight:
+                break
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                t = inflight.pop(fut)
+                running_per_stage[t.stage] -= 1
+                first_line = message_error(t.message) or (t.message.splitlines()[0] if t.message else "")
+                on_event(
+                    f"[{'OK' if t.status == 'ok' else 'FAIL'}] {t.name} {t.seconds:.1f}s "
+                    f"sql={t.sql.get('statements', 0)}/{t.sql.get('db_ms', 0) / 1000:.1f}s {first_line}"
+                )
+                if t.status != "ok":
+                    skip_dependents(t.name)
+
+    return tasks
+
+def summary(tasks: dict[str, Task], wall_s: float) -> str:
+    by_stage: dict[str, list[Task]] = {}
+    for t in tasks.values():
+        by_stage.setdefault(t.stage, []).append(t)
+    lines = [f"Pipeline done in {wall_s:.1f}s"]
+    for stage in STAGES:
+        ts = by_stage.get(stage)
+        if not ts:
+            continue
+        counts = {s: sum(1 for t in ts if t.status == s) for s in ("ok", "failed", "skipped")}
+        total = sum(t.seconds for t in ts)
+        slowest = max(ts, key=lambda t: t.seconds)
+        stmts = sum(t.sql.get("statements", 0) for t in ts)
+        lines.append(
+            f"  {stage:<8} tasks={len(ts)} ok={counts['ok']} failed={counts['failed']} skipped={counts['skipped']} "
+            f"sum={total:.1f}s max={slowest.seconds:.1f}s ({slowest.name}) sql={stmts}"
+        )
+    return "\n".join(lines)
+
+def write_json(tasks: dict[str, Task], wall_s: float, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "wall_s": round(wall_s, 3),
+        "tasks": [
+            {"name": t.name, "stage": t.stage, "deps": t.deps, "status": t.status,
+             "seconds": round(t.seconds, 3), "message": t.message, "sql": t.sql}
+            for t in tasks.values()
+        ],
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def _parse_limits(items: list[str]) -> dict[str, int]:
+    out = {}
+    for item in items:
+        stage, _, n = item.partition("=")
+        if stage not in STAGES or not n.isdigit():
+            raise argparse.ArgumentTypeError(f"Bad --limit {item!r} (expected stage=N)")
+        out[stage] = int(n)
+    return out
+
+def main(argv: list[str] | None = None) -> int:
+    today = date.today()
+    ap = argparse.ArgumentParser(prog="python -m app.pipeline", description="ETL + raporty dla wielu krajów (graf etapów)")
+    ap.add_argument("--countries", nargs="*", default=None, help="kody krajów (domyślnie cała UE)")
+    ap.add_argument("--start", default=(today + timedelta(days=7)).strftime("%Y-%m-%d"))
+    ap.add_argument("--end", default=(today + timedelta(days=14)).strftime("%Y-%m-%d"))
+    ap.add_argument("--offers-to", default=None, help="kraj docelowy ofert (bez tego etap offers jest pomijany)")
+    ap.add_argument("--skip", nargs="*", choices=STAGES, default=[])
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="maks. równoległych zadań")
+    ap.add_argument("--limit", nargs="*", default=["weather=2", "offers=1"],
+                    help="limity per etap, np. weather=2 offers=1")
+    ap.add_argument("--flights-per-day", type=int, default=6)
+    ap.add_argument("--json", type=Path, default=None, help="zapis czasów etapów do pliku JSON")
+    args = ap.parse_args(argv)
+
+    countries = [c.upper() for c in (args.countries or EU_COUNTRY_CODES)]
+    unknown = [c for c in countries if c not in TOP_AIRPORTS]
+    if unknown:
+        ap.error(f"Unknown country codes: {unknown}")
+
+    tasks = build_tasks(
+        countries, args.start, args.end,
+        offers_to=args.offers_to.upper() if args.offers_to else None,
+        skip=set(args.skip), flights_per_day=args.flights_per_day,
+    )
+    t0 = time.perf_counter()
+    run_tasks(tasks, args.workers, _parse_limits(args.limit))
+    wall = time.perf_counter() - t0
+
+    print(summary(tasks, wall))
+    if args.json:
+        write_json(tasks, wall, args.json)
+    return 0 if all(t.status == "ok" for t in tasks.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
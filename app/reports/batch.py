@@ -0,0 +1,120 @@
+import argparse
+import html
+import importlib
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from app.config.eu_codes import EU_COUNTRY_CODES
+from app.config.eu_countries import EU_COUNTRIES
+from app.config.settings import DB_READ_MAX_OVERFLOW, DB_READ_POOL_SIZE
+
+REPORT_DIR = Path("reports")
+
+# nazwa -> moduł z main(country_code), importowany w procesie roboczym (_run_one).
+# Uwaga: spawn najpierw importuje w procesie moduł __main__ rodzica - uruchomione
+# z gui.py, które importuje raporty, ma już pyplot przed _init_worker.
+REPORT_MODULES = {
+    "weather_risk": "app.reports.report_weather_risk",
+    "ops_vs_risk": "app.reports.report_operations_vs_risk",
+    "prices_vs_risk": "app.reports.report_prices_vs_risk",
+}
+
+REPORT_TITLES = {
+    "weather_risk": "Pogoda: risk (daily)",
+    "ops_vs_risk": "Operacje vs ryzyko (forecast)",
+    "prices_vs_risk": "Ceny vs ryzyko (forecast)",
+}
+
+def _init_worker() -> None:
+    # pyplot mógł być już zaimportowany (patrz wyżej) - matplotlib.use przełącza
+    # wtedy backend pyplot, co działa, dopóki proces nie utworzył żadnej figury
+    os.environ["MPLBACKEND"] = "Agg"
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _run_one(name: str, country_code: str):
+    try:
+        mod = importlib.import_module(REPORT_MODULES[name])
+        return name, country_code, mod.main(country_code), None
+    except Exception as e:
+        return name, country_code, ("", "", ""), f"{type(e).__name__}: {e}"
+
+def write_index(results: list[tuple], path: Path = REPORT_DIR / "index.html") -> str:
+    """
+    Strona z linkami do wszystkich wygenerowanych raportów (kraj × raport).
+    """
+    by_cc: dict[str, dict] = {}
+    for name, cc, paths, err in results:
+        by_cc.setdefault(cc, {})[name] = (paths, err)
+    names = [n for n in REPORT_MODULES if any(n in v for v in by_cc.values())]
+
+    def link(p: str, label: str) -> str:
+        if not p:
+            return ""
+        rel = os.path.relpath(Path(p).resolve(), path.parent.resolve())
+        return f"<a href='{html.escape(Path(rel).as_posix())}'>{label}</a>"
+
+    out = ["<h2>Raporty UE</h2>", "<table border='1' cellpadding='4'>"]
+    out.append("<tr><th>Kraj</th>" + "".join(f"<th>{html.escape(REPORT_TITLES.get(n, n))}</th>" for n in names) + "</tr>")
+    for cc in sorted(by_cc):
+        cells = []
+        for n in names:
+            paths, err = by_cc[cc].get(n, (("", "", ""), None))
+            if err:
+                cells.append(f"<td>ERROR: {html.escape(err)}</td>")
+                continue
+            csv_path, png_path, html_path = paths
+            cells.append("<td>" + " ".join(x for x in [
+                link(html_path, "HTML"), link(csv_path, "CSV"), link(png_path, "PNG"),
+            ] if x) + "</td>")
+        out.append(f"<tr><td>{html.escape(EU_COUNTRIES.get(cc, cc))} ({cc})</td>" + "".join(cells) + "</tr>")
+    out.append("</table>")
+
+    path.parent.mkdir(exist_ok=True)
+    path.write_text("\n".join(out), encoding="utf-8")
+    return str(path)
+
+def run_batch(
+    report_names: list[str] | None = None,
+    countries: list[str] | None = None,
+    workers: int | None = None,
+    on_result=None,
+) -> str:
+    """
+    Generuje wybrane raporty dla wybranych krajów (domyślnie: wszystkie × cała UE)
+    w puli procesów (matplotlib nie jest bezpieczny wątkowo; każdy proces używa Agg).
+    Zwraca ścieżkę do reports/index.html.
+    """
+    names = report_names or list(REPORT_MODULES)
+    unknown = [n for n in names if n not in REPORT_MODULES]
+    if unknown:
+        raise ValueError(f"Unknown reports: {unknown}")
+    ccs = countries or list(EU_COUNTRY_CODES)
+
+    # każdy proces trzyma własne połączenie odczytu - domyślnie nie więcej procesów
+    # niż pozwala budżet puli odczytów, żeby raporty nie wyczerpały max_connections
+    if workers is None:
+        workers = max(1, min(os.cpu_count() or 1, DB_READ_POOL_SIZE + DB_READ_MAX_OVERFLOW))
+
+    # spawn: procesy nie dziedziczą puli połączeń DB ani stanu Tk rodzica
+    ctx = mp.get_context("spawn")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        futures = [pool.submit(_run_one, n, cc) for cc in ccs for n in names]
+        for fut in as_completed(futures):
+            res = fut.result()
+            results.append(res)
+            if on_result is not None:
+                name, cc, _paths, err = res
+                on_result(f"{name} {cc}: {'ERROR ' + err if err else 'OK'}")
+
+    return write_index(results)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Raporty dla wielu krajów UE równolegle")
+    ap.add_argument("--reports", nargs="*", choices=list(REPORT_MODULES), default=None)
+    ap.add_argument("--countries", nargs="*", default=None)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    print(run_batch(args.reports, args.countries, args.workers, on_result=print))
@@ -0,0 +1,40 @@
+import functools
+import json
+from pathlib import Path
+from app.db.connection import get_read_engine
+from app.db.data_version import fingerprint
+
+CACHE_DIR = Path("reports") / ".cache"
+
+def cached_report(name: str, tables: tuple[str, ...]):
+    """
+    Dekorator dla main(country_code) raportu: jeśli wersje tabel źródłowych
+    (etl_data_version) się nie zmieniły, a pliki istnieją - zwraca poprzednie
+    (csv, png, html) bez zapytań i renderowania. force=True wymusza przebudowę.
+    Jeden plik metadanych na raport+kraj (bezpieczne dla równoległych procesów).
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(country_code: str, force: bool = False):
+            engine = get_read_engine()
+            with engine.connect() as conn:
+                fp = fingerprint(conn, tables)
+
+            meta_path = CACHE_DIR / f"{name}_{country_code}.json"
+            if not force and meta_path.exists():
+                try:
+                    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                except ValueError:
+                    meta = {}
+                paths = meta.get("paths") or []
+                if meta.get("fingerprint") == fp and paths and all(not p or Path(p).exists() for p in paths):
+                    return tuple(paths)
+
+            out = fn(country_code)
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = meta_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"fingerprint": fp, "paths": list(out)}), encoding="utf-8")
+            tmp.replace(meta_path)
+            return out
+        return wrapper
+    return deco
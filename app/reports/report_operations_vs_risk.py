@@ -1,32 +1,30 @@
 from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
-from sqlalchemy import text
-from app.db.connection import get_engine
+from app.db.analytics import read_df
+from app.reports.report_cache import cached_report
 
 REPORT_DIR = Path("reports")
 
+# agregaty utrzymywane przez ETL (app/etl/report_aggregates.py)
+QUERY = """
+    SELECT
+      risk_level,
+      status,
+      SUM(flights_cnt) AS flights_cnt
+    FROM agg_ops_risk_daily
+    WHERE country_code=:cc
+    GROUP BY risk_level, status
+    ORDER BY CASE risk_level WHEN 'LOW' THEN 1 WHEN 'MEDIUM' THEN 2 WHEN 'HIGH' THEN 3 END, status
+"""
+
+@cached_report("ops_vs_risk", ("agg_ops_risk_daily",))
 def main(country_code: str):
     REPORT_DIR.mkdir(exist_ok=True)
-    q = text("""
-    SELECT
-      COALESCE(r.risk_level,'LOW') AS risk_level,
-      f.status,
-      COUNT(*) AS flights_cnt
-    FROM flights f
-    JOIN airports a ON a.iata_code=f.dep_iata
-    LEFT JOIN weather_risk_daily r
-      ON r.iata_code=f.dep_iata
-     AND r.day=DATE(f.sched_dep)
-     AND r.source='forecast'
-    WHERE a.country_code=:cc
-    GROUP BY COALESCE(r.risk_level,'LOW'), f.status
-    ORDER BY FIELD(COALESCE(r.risk_level,'LOW'),'LOW','MEDIUM','HIGH'), f.status
-    """)
-
-    engine = get_engine()
-    with engine.connect() as conn:
-        df = pd.read_sql(q, conn, params={"cc": country_code})
+
+    df = read_df(QUERY, {"cc": country_code})
+    # SUM zwraca DECIMAL (MySQL) / HUGEINT (DuckDB) - w raporcie liczba całkowita
+    df["flights_cnt"] = pd.to_numeric(df["flights_cnt"]).astype("int64")
 
     csv_path = REPORT_DIR / f"ops_vs_risk_{country_code}.csv"
     df.to_csv(csv_path, index=False)
@@ -1,35 +1,31 @@
 from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
-from sqlalchemy import text
-from app.db.connection import get_engine
+from app.db.analytics import read_df
+from app.reports.report_cache import cached_report
 
 REPORT_DIR = Path("reports")
 
+# agregaty utrzymywane przez ETL (app/etl/report_aggregates.py)
+QUERY = """
+    SELECT
+        risk_level,
+        source,
+        SUM(offers_cnt) AS offers_cnt,
+        ROUND(SUM(price_sum) / SUM(offers_cnt), 2) AS avg_price
+    FROM agg_offers_risk_daily
+    WHERE country_code = :cc
+    GROUP BY risk_level, source
+    ORDER BY CASE risk_level WHEN 'LOW' THEN 1 WHEN 'MEDIUM' THEN 2 WHEN 'HIGH' THEN 3 END, source
+"""
+
+@cached_report("prices_vs_risk", ("agg_offers_risk_daily",))
 def main(country_code: str):
     REPORT_DIR.mkdir(exist_ok=True)
 
-    q = text("""
-    SELECT
-        COALESCE(r.risk_level,'LOW') AS risk_level,
-        o.source,
-        COUNT(*) AS offers_cnt,
-        ROUND(AVG(o.price_total),2) AS avg_price
-    FROM amadeus_flight_offers o
-    JOIN amadeus_offer_requests req ON req.request_id = o.request_id
-    JOIN airports a ON a.iata_code = req.origin_iata
-    LEFT JOIN weather_risk_daily r
-      ON r.iata_code = req.origin_iata
-     AND r.day = req.depart_date
-     AND r.source = 'forecast'
-    WHERE a.country_code = :cc
-    GROUP BY COALESCE(r.risk_level,'LOW'), o.source
-    ORDER BY FIELD(COALESCE(r.risk_level,'LOW'),'LOW','MEDIUM','HIGH'), o.source
-    """)
-
-    engine = get_engine()
-    with engine.connect() as conn:
-        df = pd.read_sql(q, conn, params={"cc": country_code})
+    df = read_df(QUERY, {"cc": country_code})
+    df["offers_cnt"] = pd.to_numeric(df["offers_cnt"]).astype("int64")
+    df["avg_price"] = pd.to_numeric(df["avg_price"])
 
     csv_path = REPORT_DIR / f"prices_vs_risk_{country_code}.csv"
     df.to_csv(csv_path, index=False)
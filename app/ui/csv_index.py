@@ -0,0 +1,133 @@
+import csv
+import io
+from array import array
+from pathlib import Path
+
+BOM = b"\xef\xbb\xbf"
+
+def _sort_key(value: str):
+    # liczby przed tekstem, liczby porównywane numerycznie
+    try:
+        return (0, float(value), "")
+    except ValueError:
+        return (1, 0.0, value.lower())
+
+class CsvIndex:
+    """
+    Indeks offsetów wierszy pliku CSV: jeden przebieg binarny, w pamięci tylko
+    pozycje początków rekordów (8 B/wiersz). Pola w cudzysłowach z nowymi liniami
+    obsłużone przez parzystość '"' (escape "" nie zmienia parzystości).
+    Wiersze czytane na żądanie: seek + csv.reader na fragmencie.
+    """
+
+    def __init__(self, path: str | Path, encoding: str = "utf-8"):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.header: list[str] = []
+        self.offsets = array("q")
+        self.end = 0
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def build(self) -> "CsvIndex":
+        offsets = array("q")
+        header_span = None
+        with self.path.open("rb") as f:
+            pos = 3 if f.read(3) == BOM else 0
+            f.seek(pos)
+            rec_start = pos
+            in_quotes = False
+            for line in f:
+                if not in_quotes:
+                    rec_start = pos
+                if line.count(b'"') % 2:
+                    in_quotes = not in_quotes
+                pos += len(line)
+                if in_quotes or not line.strip(b"\r\n"):
+                    continue
+                if header_span is None:
+                    header_span = (rec_start, pos)
+                else:
+                    offsets.append(rec_start)
+            self.end = pos
+
+            if header_span is not None:
+                f.seek(header_span[0])
+                self.header = self._parse(f.read(header_span[1] - header_span[0]))[0]
+        self.offsets = offsets
+        return self
+
+    def _parse(self, data: bytes) -> list[list[str]]:
+        text = data.decode(self.encoding, errors="replace")
+        return [r for r in csv.reader(io.StringIO(text, newline="")) if r]
+
+    def _span_end(self, i: int) -> int:
+        return self.offsets[i + 1] if i + 1 < len(self.offsets) else self.end
+
+    def read_rows(self, indices) -> list[list[str]]:
+        """
+        Wiersze o podanych numerach (kolejność zachowana). Kolejne numery
+        czytane jednym odczytem.
+        """
+        indices = list(indices)
+        out: dict[int, list[str]] = {}
+        with self.path.open("rb") as f:
+            for run in _runs(sorted(set(indices))):
+                first, last = run[0], run[-1]
+                f.seek(self.offsets[first])
+                rows = self._parse(f.read(self._span_end(last) - self.offsets[first]))
+                out.update(zip(run, rows))
+        return [out.get(i, []) for i in indices]
+
+    def rows(self, start: int, count: int, view=None) -> list[list[str]]:
+        """
+        Strona [start, start+count) widoku (view = permutacja numerów wierszy
+        po filtrze/sortowaniu; None = kolejność w pliku).
+        """
+        total = len(view) if view is not None else len(self.offsets)
+        stop = min(total, start + count)
+        if start >= stop:
+            return []
+        idx = view[start:stop] if view is not None else range(start, stop)
+        return self.read_rows(idx)
+
+    def compute_view(self, filter_text: str = "", sort_col: str | None = None, desc: bool = False):
+        """
+        Jeden strumieniowy przebieg po pliku: numery wierszy pasujących do filtra
+        (podciąg, bez wielkości liter, dowolna kolumna), posortowane po sort_col.
+        Zwraca None, gdy nie ma ani filtra, ani sortowania.
+        """
+        needle = filter_text.strip().lower()
+        if not needle and sort_col is None:
+            return None
+        col = self.header.index(sort_col) if sort_col in self.header else None
+
+        # utf-8-sig pomija BOM (pandas/Excel), dla utf-8 bez BOM działa tak samo
+        encoding = "utf-8-sig" if self.encoding == "utf-8" else self.encoding
+        kept = []
+        with self.path.open("r", encoding=encoding, errors="replace", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            i = 0
+            for row in reader:
+                if not row:
+                    continue
+                if not needle or any(needle in v.lower() for v in row):
+                    key = _sort_key(row[col]) if col is not None and col < len(row) else (2, 0.0, "")
+                    kept.append((key, i))
+                i += 1
+
+        if col is not None:
+            kept.sort(key=lambda t: t[0], reverse=desc)
+        return array("q", (i for _, i in kept))
+
+def _runs(sorted_indices: list[int]):
+    run = []
+    for i in sorted_indices:
+        if run and i != run[-1] + 1:
+            yield run
+            run = []
+        run.append(i)
+    if run:
+        yield run
@@ -0,0 +1,223 @@
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+from app.ui.csv_index import CsvIndex
+
+class CsvPreview(ttk.Frame):
+    """
+    Wirtualny podgląd CSV: w Treeview są tylko widoczne wiersze, reszta czytana
+    blokami z pliku (CsvIndex) przy przewijaniu. Indeksowanie, odczyt bloków,
+    filtr i sortowanie działają w jednym wątku roboczym; wyniki wracają do Tk
+    przez after(). Każda zmiana pliku/widoku podbija _gen - spóźnione wyniki
+    starszych zadań są ignorowane.
+    """
+
+    BLOCK_ROWS = 200
+    MAX_BLOCKS = 50
+
+    def __init__(self, master, height: int = 8, on_error=None, **kw):
+        super().__init__(master, **kw)
+        self.on_error = on_error
+
+        bar = ttk.Frame(self)
+        bar.pack(fill="x", pady=(0, 4))
+        ttk.Label(bar, text="Filtr:").pack(side="left")
+        self.filter_var = tk.StringVar()
+        entry = ttk.Entry(bar, textvariable=self.filter_var, width=30)
+        entry.pack(side="left", padx=5)
+        entry.bind("<Return>", lambda _e: self.apply_filter())
+        ttk.Button(bar, text="Filtruj", command=self.apply_filter).pack(side="left")
+        ttk.Button(bar, text="Wyczyść", command=self.clear_filter).pack(side="left", padx=5)
+        self.status_var = tk.StringVar()
+        ttk.Label(bar, textvariable=self.status_var).pack(side="right")
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(body, show="headings", height=height)
+        self.vsb = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.vsb.pack(side="right", fill="y")
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", self._on_wheel)
+        self.tree.bind("<Button-5>", self._on_wheel)
+        self.tree.bind("<Configure>", lambda _e: self._render())
+
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-preview")
+        self._index: CsvIndex | None = None
+        self._view = None
+        self._gen = 0
+        self._top = 0
+        self._blocks: OrderedDict[int, list] = OrderedDict()
+        self._pending: set[int] = set()
+        self._sort_col: str | None = None
+        self._sort_desc = False
+
+    # --- API ---
+
+    def load(self, path: str) -> None:
+        self._gen += 1
+        gen = self._gen
+        self._index = None
+        self._reset_view(None)
+        self._sort_col, self._sort_desc = None, False
+        self.filter_var.set("")
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = []
+        self.status_var.set("Indeksowanie...")
+        self._submit(gen, lambda: CsvIndex(path).build(), self._on_loaded)
+
+    def apply_filter(self) -> None:
+        self._recompute("Filtrowanie...")
+
+    def clear_filter(self) -> None:
+        self.filter_var.set("")
+        self._recompute("Filtrowanie...")
+
+    def sort_by(self, col: str) -> None:
+        if self._sort_col == col:
+            self._sort_desc = not self._sort_desc
+        else:
+            self._sort_col, self._sort_desc = col, False
+        self._recompute("Sortowanie...")
+
+    def destroy(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    # --- wątek roboczy ---
+
+    def _submit(self, gen: int, fn, done) -> None:
+        def job():
+            try:
+                res = fn()
+            except Exception as e:
+                self.after(0, self._on_failed, gen, e)
+                return
+            self.after(0, done, gen, res)
+        self._pool.submit(job)
+
+    def _recompute(self, status: str) -> None:
+        index = self._index
+        if index is None:
+            return
+        self._gen += 1
+        text, col, desc = self.filter_var.get(), self._sort_col, self._sort_desc
+        self.status_var.set(status)
+        self._submit(self._gen, lambda: index.compute_view(text, col, desc), self._on_view)
+
+    def _fetch(self, blocks: list[int]) -> None:
+        index, view = self._index, self._view
+        self._pending.update(blocks)
+        self._submit(
+            self._gen,
+            lambda: {b: index.rows(b * self.BLOCK_ROWS, self.BLOCK_ROWS, view) for b in blocks},
+            self._on_blocks,
+        )
+
+    # --- wątek Tk ---
+
+    def _on_loaded(self, gen: int, index: CsvIndex) -> None:
+        if gen != self._gen:
+            return
+        self._index = index
+        self.tree["columns"] = index.header
+        for h in index.header:
+            self.tree.heading(h, text=h, command=lambda c=h: self.sort_by(c))
+            self.tree.column(h, width=130, stretch=True)
+        self._render()
+
+    def _on_view(self, gen: int, view) -> None:
+        if gen != self._gen:
+            return
+        self._reset_view(view)
+        for h in self._index.header:
+            arrow = (" ▼" if self._sort_desc else " ▲") if h == self._sort_col else ""
+            self.tree.heading(h, text=h + arrow)
+        self._render()
+
+    def _on_blocks(self, gen: int, blocks: dict) -> None:
+        if gen != self._gen:
+            return
+        self._pending.difference_update(blocks)
+        self._blocks.update(blocks)
+        while len(self._blocks) > self.MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        self._render()
+
+    def _on_failed(self, gen: int, err: Exception) -> None:
+        if gen != self._gen:
+            return
+        self.status_var.set(f"ERROR: {err}")
+        if self.on_error is not None:
+            self.on_error(f"CSV preview error: {err}")
+
+    def _reset_view(self, view) -> None:
+        self._view = view
+        self._top = 0
+        self._blocks.clear()
+        self._pending.clear()
+
+    def _total(self) -> int:
+        if self._index is None:
+            return 0
+        return len(self._view) if self._view is not None else len(self._index)
+
+    def _visible_rows(self) -> int:
+        h = self.tree.winfo_height()
+        if h <= 1:
+            return int(self.tree.cget("height"))
+        row_h = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        return max(1, (h - row_h) // row_h)
+
+    def _render(self) -> None:
+        if self._index is None:
+            return
+        total, n = self._total(), self._visible_rows()
+        self._top = max(0, min(self._top, total - n))
+        first_b = self._top // self.BLOCK_ROWS
+        last_b = max(first_b, (self._top + n - 1) // self.BLOCK_ROWS)
+        needed = range(first_b, last_b + 1)
+
+        missing = [b for b in needed if b not in self._blocks and b not in self._pending]
+        if missing:
+            self._fetch(missing)
+        if any(b not in self._blocks for b in needed):
+            return  # dorysujemy po _on_blocks
+
+        rows = []
+        for b in needed:
+            self._blocks.move_to_end(b)
+            rows.extend(self._blocks[b])
+        start = self._top - first_b * self.BLOCK_ROWS
+        rows = rows[start:start + n]
+
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert("", "end", values=row)
+
+        if total:
+            self.vsb.set(self._top / total, min(1.0, (self._top + len(rows)) / total))
+            self.status_var.set(f"wiersze {self._top + 1}-{self._top + len(rows)} z {total}")
+        else:
+            self.vsb.set(0.0, 1.0)
+            self.status_var.set("brak wierszy")
+
+    def _scroll_to(self, top: int) -> None:
+        self._top = max(0, top)
+        self._render()
+
+    def _on_scrollbar(self, *args) -> None:
+        n = self._visible_rows()
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self._total()))
+        elif args[0] == "scroll":
+            step = n if args[2] == "pages" else 1
+            self._scroll_to(self._top + int(args[1]) * step)
+
+    def _on_wheel(self, event) -> str:
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self._top - 3)
+        else:
+            self._scroll_to(self._top + 3)
+        return "break"
@@ -0,0 +1,302 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from bench.stubs import StubServer
+
+# Benchmark ETL i raportów na lokalnej bazie MySQL (osobna baza, domyślnie
+# airline_bench) z lokalnymi zastępnikami Open-Meteo/Amadeus (bench/stubs.py).
+#
+#   python -m bench.run_bench --scale small
+#   python -m bench.run_bench --scale medium --compare bench/results/<poprzedni>.json
+#
+# Zmienne środowiskowe (DB_*, AMADEUS_*, OPEN_METEO_CACHE_ENABLED) ustawiane są
+# PRZED importem app.*, bo app/config/settings czyta je przy imporcie.
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "bench" / "results"
+WORK_DIR = ROOT / "bench" / ".work"
+
+SCALES = {
+    "small": {"airports": 5, "days": 7, "flights_per_day": 10, "offers_per_request": 10},
+    "medium": {"airports": 30, "days": 30, "flights_per_day": 50, "offers_per_request": 20},
+    "large": {"airports": 100, "days": 90, "flights_per_day": 200, "offers_per_request": 50},
+}
+
+# ---------- baza ----------
+
+def apply_schema(db_name: str, reset: bool) -> None:
+    """
+    Tworzy bazę benchmarku i wykonuje sql/002.. (USE airline_final -> USE <db_name>).
+    """
+    from sqlalchemy import create_engine, text
+    from app.config.settings import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD
+
+    url = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/?charset=utf8mb4"
+    engine = create_engine(url, future=True)
+    with engine.connect() as conn:
+        exists = conn.execute(text("SHOW DATABASES LIKE :db"), {"db": db_name}).first() is not None
+        if exists and not reset:
+            return
+        conn.execute(text(f"DROP DATABASE IF EXISTS `{db_name}`"))
+        conn.execute(text(f"CREATE DATABASE `{db_name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"))
+        for path in sorted((ROOT / "sql").glob("*.sql")):
+            if path.name.startswith("001_"):
+                continue
+            sql = path.read_text(encoding="utf-8").replace("USE airline_final;", f"USE `{db_name}`;")
+            sql = "\n".join(line for line in sql.splitlines() if not line.lstrip().startswith("--"))
+            for stmt in sql.split(";"):
+                if stmt.strip():
+                    conn.exec_driver_sql(stmt)
+        conn.commit()
+    engine.dispose()
+
+def write_airports_csv(path: Path, country: str, n_airports: int) -> list[str]:
+    """
+    Plik w formacie OurAirports (gzip): wszystkie TOP_AIRPORTS (cele lotów/ofert)
+    + syntetyczne lotniska kraju benchmarku. Zwraca listę lotnisk kraju (n_airports).
+    """
+    from app.config.top_airports import TOP_AIRPORTS
+
+    rnd = random.Random(42)
+    rows = []
+    for cc, codes in TOP_AIRPORTS.items():
+        for iata in codes:
+            rows.append((iata, f"{iata} Airport", cc, rnd.uniform(36, 60), rnd.uniform(-9, 28)))
+
+    own = list(TOP_AIRPORTS.get(country, []))
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    i = 0
+    while len(own) < n_airports:
+        iata = "Q" + letters[i // 26 % 26] + letters[i % 26]
+        i += 1
+        own.append(iata)
+        rows.append((iata, f"Bench {iata}", country, rnd.uniform(36, 60), rnd.uniform(-9, 28)))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["ident", "type", "name", "latitude_deg", "longitude_deg", "iso_country", "iata_code"])
+        for iata, name, cc, lat, lon in rows:
+            w.writerow([iata, "large_airport", name, f"{lat:.5f}", f"{lon:.5f}", cc, iata])
+    return own[:n_airports]
+
+# ---------- pomiar ----------
+
+def measure(name: str, fn, stubs: StubServer, memory: bool) -> dict:
+    from app.db.metrics import track_run
+    from app.pipeline import message_error
+
+    stubs.take_counts()
+    if memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    # metryki tylko w wyniku benchmarku - bez dopisywania do SQL_METRICS_PATH
+    with track_run(name, path=None) as m:
+        try:
+            msg = str(fn())
+            # błędy zgłoszone w komunikacie (weather "ERROR", offers "error=N") = etap nieudany
+            ok = not message_error(msg)
+        except Exception as e:
+            msg, ok = f"{type(e).__name__}: {e}", False
+    wall = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    if memory:
+        tracemalloc.stop()
+
+    res = {
+        "name": name,
+        "ok": ok,
+        "wall_s": round(wall, 4),
+        "statements": m.statements,
+        "rows": m.rows,
+        "rows_per_s": round(m.rows / wall, 1) if wall > 0 else 0.0,
+        "db_s": round(m.db_ms / 1000, 4),
+        "peak_mem_mb": round(peak / 2**20, 2) if memory else None,
+        "http_requests": stubs.take_counts(),
+        "message": (message_error(msg) or (msg.splitlines()[0] if msg else ""))[:300],
+        "latency_hist": m.summary()["latency_hist"],
+        "slowest_sql": m.slowest(3),
+    }
+    print(
+        f"{'OK ' if ok else 'ERR'} {name:<28} {wall:8.3f}s  stmts={res['statements']:<7} "
+        f"db={res['db_s']:<8} rows={res['rows']:<9} rows/s={res['rows_per_s']:<10} peak={res['peak_mem_mb']}MB"
+    )
+    return res
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def compare(current: dict, path: Path) -> None:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    prev = {r["name"]: r for r in data["results"]}
+    print(f"\nvs {path.name} (commit {data.get('commit', '?')}):")
+    for r in current["results"]:
+        p = prev.get(r["name"])
+        if not p or not p["wall_s"]:
+            continue
+        print(f"  {r['name']:<28} wall x{r['wall_s'] / p['wall_s']:.2f}  stmts {p['statements']} -> {r['statements']}")
+
+# ---------- scenariusz ----------
+
+def steps(args, airports: list[str], csv_path: Path):
+    from app.etl.import_airports_ourairports import run as etl_import_airports
+    from app.etl.etl_weather_country import run as etl_weather
+    from app.etl.build_weather_risk_daily import run as etl_risk
+    from app.etl.generate_operations import run as etl_ops
+    from app.etl.apply_weather_impact import run as etl_impact
+    from app.etl.fetch_offers_batch import run_matrix as etl_offers_matrix
+    from app.etl.fetch_offers_with_fallback import run as etl_offers_one
+    from app.etl.weather_retention import run as etl_retention
+    from app.reports import report_operations_vs_risk, report_prices_vs_risk, report_weather_risk
+    from app.config.settings import WEATHER_BATCH_SIZE, WEATHER_DB_WORKERS, WEATHER_WORKERS
+    from app.config.top_airports import TOP_AIRPORTS
+
+    cc, dest = args.country, args.dest_country
+    start = date.today() + timedelta(days=1)
+    end = start + timedelta(days=args.days - 1)
+    s, e = start.isoformat(), end.isoformat()
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(args.days)]
+    origins, dests = airports[:2], TOP_AIRPORTS[dest][:2]
+    legacy = args.modes == "legacy"
+
+    out = [("import_airports", lambda: etl_import_airports(path=csv_path))]
+    if legacy:
+        out += [
+            ("weather[serial]", lambda: etl_weather(cc, s, e)),
+            ("risk[python]", lambda: etl_risk(cc, mode="python")),
+            ("operations[row]", lambda: etl_ops(cc, s, e, flights_per_day=args.flights_per_day)),
+            ("impact[row]", lambda: etl_impact(cc, mode="row", seed=args.seed)),
+            ("offers[single]", lambda: "\n".join(
+                etl_offers_one(o, d, day, fresh_ttl_s=0) for day in dates for o in origins for d in dests
+            )),
+        ]
+    else:
+        out += [
+            ("weather[parallel]", lambda: etl_weather(cc, s, e, workers=WEATHER_WORKERS,
+                                                      db_workers=WEATHER_DB_WORKERS, batch_size=WEATHER_BATCH_SIZE)),
+            ("risk[server]", lambda: etl_risk(cc, mode="server", full=True)),
+            ("operations[bulk]", lambda: etl_ops(cc, s, e, flights_per_day=args.flights_per_day, bulk=True)),
+            ("impact[set]", lambda: etl_impact(cc, mode="set", seed=args.seed)),
+            ("offers[matrix]", lambda: etl_offers_matrix(dates, origins, dests, fresh_ttl_s=0)),
+        ]
+    out += [
+        ("weather_retention", lambda: etl_retention()),
+        ("report:weather_risk", lambda: report_weather_risk.main(cc, force=True)),
+        ("report:ops_vs_risk", lambda: report_operations_vs_risk.main(cc, force=True)),
+        ("report:prices_vs_risk", lambda: report_prices_vs_risk.main(cc, force=True)),
+    ]
+    return out
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.run_bench", description="Benchmark ETL i raportów")
+    ap.add_argument("--scale", choices=list(SCALES), default="small")
+    ap.add_argument("--airports", type=int, default=None, help="lotniska kraju benchmarku")
+    ap.add_argument("--days", type=int, default=None)
+    ap.add_argument("--flights-per-day", type=int, default=None)
+    ap.add_argument("--offers-per-request", type=int, default=None)
+    ap.add_argument("--country", default="PL")
+    ap.add_argument("--dest-country", default="DE")
+    ap.add_argument("--modes", choices=["fast", "legacy"], default="fast",
+                    help="fast: tryby używane przez GUI; legacy: pierwotne ścieżki wiersz-po-wierszu")
+    ap.add_argument("--backend", choices=["mysql", "sqlite"], default=os.getenv("DB_BACKEND", "mysql"),
+                    help="sqlite: plik bench/.work/<db-name>.sqlite, bez serwera MySQL")
+    ap.add_argument("--db-name", default="airline_bench")
+    ap.add_argument("--no-reset", action="store_true", help="nie odtwarzaj bazy benchmarku")
+    ap.add_argument("--stub-latency-ms", type=float, default=0.0)
+    ap.add_argument("--no-memory", action="store_true", help="bez tracemalloc (mniejszy narzut na czas)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", type=Path, default=None)
+    ap.add_argument("--compare", type=Path, default=None)
+    args = ap.parse_args(argv)
+
+    for k, v in SCALES[args.scale].items():
+        if getattr(args, k) is None:
+            setattr(args, k, v)
+    args.country, args.dest_country = args.country.upper(), args.dest_country.upper()
+    # os.chdir(WORK_DIR) niżej - ścieżki z linii poleceń rozwiązujemy wcześniej
+    args.out = args.out.resolve() if args.out else None
+    args.compare = args.compare.resolve() if args.compare else None
+    if not re.fullmatch(r"[A-Za-z0-9_]+", args.db_name):
+        ap.error("--db-name: only letters, digits and _")
+
+    stubs = StubServer(offers_per_request=args.offers_per_request, latency_ms=args.stub_latency_ms).start()
+    sqlite_path = WORK_DIR / f"{args.db_name}.sqlite"
+    os.environ.update({
+        "DB_BACKEND": args.backend,
+        "SQL_METRICS_ENABLED": "1",
+        "DB_NAME": args.db_name,
+        "DB_SQLITE_PATH": str(sqlite_path),
+        "AMADEUS_BASE_URL": stubs.url,
+        "AMADEUS_API_KEY": "bench",
+        "AMADEUS_API_SECRET": "bench",
+        "OPEN_METEO_CACHE_ENABLED": "0",
+        "MPLBACKEND": "Agg",
+    })
+    random.seed(args.seed)
+
+    from app.api import open_meteo_client
+    from app.config.top_airports import TOP_AIRPORTS
+    from app.db.connection import get_engine
+
+    open_meteo_client.ARCHIVE_URL = f"{stubs.url}/v1/archive"
+    open_meteo_client.FORECAST_URL = f"{stubs.url}/v1/forecast"
+    if args.country not in TOP_AIRPORTS or args.dest_country not in TOP_AIRPORTS:
+        ap.error("--country/--dest-country must be keys of TOP_AIRPORTS")
+
+    try:
+        if args.backend == "mysql":
+            apply_schema(args.db_name, reset=not args.no_reset)
+        elif not args.no_reset:
+            # schemat tworzy get_engine() przy pierwszym połączeniu (sql/sqlite/schema.sql)
+            for p in (sqlite_path, Path(f"{sqlite_path}-wal"), Path(f"{sqlite_path}-shm")):
+                p.unlink(missing_ok=True)
+        WORK_DIR.mkdir(parents=True, exist_ok=True)
+        csv_path = WORK_DIR / "airports_bench.csv.gz"
+        airports = write_airports_csv(csv_path, args.country, args.airports)
+        # ETL bierze lotniska kraju z TOP_AIRPORTS - w benchmarku: wszystkie wygenerowane
+        TOP_AIRPORTS[args.country] = airports
+
+        get_engine()
+        scenario = steps(args, airports, csv_path)
+        # raporty piszą do ./reports - w benchmarku do bench/.work/reports
+        os.chdir(WORK_DIR)
+        print(f"bench: scale={args.scale} airports={args.airports} days={args.days} "
+              f"flights/day={args.flights_per_day} offers/request={args.offers_per_request} modes={args.modes}")
+        results = [measure(name, fn, stubs, not args.no_memory) for name, fn in scenario]
+    finally:
+        stubs.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "params": {k: getattr(args, k) for k in
+                   ("backend", "scale", "airports", "days", "flights_per_day", "offers_per_request",
+                    "country", "dest_country", "modes", "seed", "stub_latency_ms")},
+        "total_wall_s": round(sum(r["wall_s"] for r in results), 4),
+        "results": results,
+    }
+    out = args.out or RESULTS_DIR / f"bench_{datetime.now():%Y%m%d-%H%M%S}_{report['commit']}_{args.backend}_{args.scale}_{args.modes}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nresults: {out}")
+    if args.compare:
+        compare(report, args.compare)
+    return 0 if all(r["ok"] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
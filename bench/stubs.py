@@ -0,0 +1,138 @@
+import json
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Lokalne zastępniki Open-Meteo i Amadeus dla benchmarku: deterministyczne
+# odpowiedzi w formacie, który parsują app/api/*, bez sieci i limitów.
+
+CARRIERS = ["LO", "LH", "AF", "KL", "IB", "AZ", "SK", "FR", "W6"]
+
+def open_meteo_location(lat: float, lon: float, start_date: str, end_date: str) -> dict:
+    d1 = datetime.strptime(start_date, "%Y-%m-%d")
+    hours = ((datetime.strptime(end_date, "%Y-%m-%d") - d1).days + 1) * 24
+    times, temp, wind, prec, vis = [], [], [], [], []
+    phase = (lat * 7.0 + lon * 3.0) % (2 * math.pi)
+    for h in range(max(0, hours)):
+        t = d1 + timedelta(hours=h)
+        x = h / 24.0 * 2 * math.pi + phase
+        times.append(t.strftime("%Y-%m-%dT%H:%M"))
+        temp.append(round(8 + 6 * math.sin(x), 1))
+        wind.append(round(max(0.0, 7 + 6 * math.sin(x / 3.1)), 1))
+        prec.append(round(max(0.0, 1.5 * math.sin(x / 1.7)), 1))
+        vis.append(round(max(200.0, 9000 + 7000 * math.sin(x / 2.3)), 0))
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": {
+            "time": times,
+            "temperature_2m": temp,
+            "wind_speed_10m": wind,
+            "precipitation": prec,
+            "visibility": vis,
+        },
+    }
+
+def amadeus_offers(origin: str, dest: str, depart_date: str, n: int) -> list[dict]:
+    seed = sum(map(ord, origin + dest + depart_date))
+    out = []
+    for i in range(n):
+        stops = (seed + i) % 3
+        out.append({
+            "price": {"total": f"{60 + (seed * 31 + i * 17) % 240 + stops * 25:.2f}", "currency": "EUR"},
+            "itineraries": [{"segments": [
+                {"carrierCode": CARRIERS[(seed + i) % len(CARRIERS)]} for _ in range(stops + 1)
+            ]}],
+        })
+    return out
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "BenchStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self) -> None:
+        if self.server.latency_s:
+            time.sleep(self.server.latency_s)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self._delay()
+        if urlparse(self.path).path == "/v1/security/oauth2/token":
+            self.server.count("amadeus_token")
+            self._send(200, {"access_token": "bench-token", "token_type": "Bearer", "expires_in": 1799})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self._delay()
+
+        if url.path in ("/v1/archive", "/v1/forecast"):
+            self.server.count("open_meteo")
+            lats = [float(x) for x in q.get("latitude", "").split(",") if x]
+            lons = [float(x) for x in q.get("longitude", "").split(",") if x]
+            items = [open_meteo_location(la, lo, q["start_date"], q["end_date"]) for la, lo in zip(lats, lons)]
+            self._send(200, items[0] if len(items) == 1 else items)
+        elif url.path == "/v2/shopping/flight-offers":
+            self.server.count("amadeus_offers")
+            self._send(200, {"data": amadeus_offers(
+                q.get("originLocationCode", ""), q.get("destinationLocationCode", ""),
+                q.get("departureDate", ""), self.server.offers_per_request,
+            )})
+        else:
+            self._send(404, {"error": "not found"})
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Jeden serwer HTTP na 127.0.0.1 (losowy port) obsługujący oba API.
+    offers_per_request: ile ofert zwraca flight-offers; latency_ms: sztuczne opóźnienie.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, offers_per_request: int = 10, latency_ms: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.offers_per_request = offers_per_request
+        self.latency_s = latency_ms / 1000.0
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def take_counts(self) -> dict[str, int]:
+        with self._lock:
+            out, self.requests = self.requests, {}
+        return out
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -4,25 +4,29 @@ import threading
 from datetime import datetime, timedelta, date
 import os
 import webbrowser
-import csv
 from pathlib import Path
-from sqlalchemy import text
 
 from app.db.connection import get_engine
+from app.db.dialect import server_version
+from app.db.metrics import track_run
+from app.db.stats import StatsService
+from app.ui.csv_preview import CsvPreview
 from app.config.eu_codes import EU_COUNTRY_CODES
 from app.config.eu_countries import EU_COUNTRIES
 from app.config.top_airports import TOP_AIRPORTS
+from app.config.settings import WEATHER_WORKERS, WEATHER_DB_WORKERS, WEATHER_BATCH_SIZE
 
 from app.etl.import_airports_ourairports import run as etl_import_airports
 from app.etl.etl_weather_country import run as etl_weather
 from app.etl.build_weather_risk_daily import run as etl_risk
 from app.etl.generate_operations import run as etl_ops
 from app.etl.apply_weather_impact import run as etl_impact
-from app.etl.fetch_offers_with_fallback import run as etl_offers
+from app.etl.fetch_offers_batch import run_matrix as etl_offers_matrix
 
 from app.reports.report_weather_risk import main as rep_weather_risk
 from app.reports.report_operations_vs_risk import main as rep_ops_vs_risk
 from app.reports.report_prices_vs_risk import main as rep_prices_vs_risk
+from app.reports.batch import run_batch as rep_batch
 
 
 class App(tk.Tk):
@@ -39,6 +43,9 @@ class App(tk.Tk):
         self.country_var = tk.StringVar()
         self.dest_country_var = tk.StringVar()
 
+        self.stats = StatsService()
+        self.stats_exact_var = tk.BooleanVar(value=False)
+
         self.report_var = tk.StringVar(value="Pogoda: risk (daily)")
         self.report_outputs = {}
 
@@ -99,12 +106,17 @@ class App(tk.Tk):
         ttk.Button(actions, text="Otwórz HTML", command=lambda: self.open_report("html")).grid(row=r, column=3, padx=5, pady=3, sticky="w")
         ttk.Button(actions, text="Otwórz CSV", command=lambda: self.open_report("csv")).grid(row=r, column=4, padx=5, pady=3, sticky="w")
         ttk.Button(actions, text="Otwórz PNG", command=lambda: self.open_report("png")).grid(row=r, column=5, padx=5, pady=3, sticky="w")
+        ttk.Button(actions, text="Raporty UE (wszystkie)", command=self.generate_all_reports).grid(row=r, column=6, padx=5, pady=3, sticky="w")
 
         mid = ttk.Frame(root)
         mid.pack(fill="both", expand=True, pady=10)
 
         stats = ttk.LabelFrame(mid, text="Statystyki", padding=10)
         stats.pack(side="left", fill="both", expand=True, padx=(0,10))
+        stats_bar = ttk.Frame(stats)
+        stats_bar.pack(fill="x")
+        ttk.Button(stats_bar, text="Odśwież", command=lambda: self.refresh_stats(force=False)).pack(side="left")
+        ttk.Checkbutton(stats_bar, text="Dokładne (COUNT)", variable=self.stats_exact_var).pack(side="left", padx=8)
         self.stats_text = tk.Text(stats, height=12)
         self.stats_text.pack(fill="both", expand=True)
 
@@ -115,13 +127,20 @@ class App(tk.Tk):
 
         prev = ttk.LabelFrame(root, text="Podgląd CSV", padding=10)
         prev.pack(fill="both", expand=True)
-        self.table = ttk.Treeview(prev, show="headings", height=8)
-        self.table.pack(fill="both", expand=True)
+        self.preview = CsvPreview(prev, height=8, on_error=self.log)
+        self.preview.pack(fill="both", expand=True)
 
     def log(self, msg: str):
         self.log_text.insert("end", msg + "\n")
         self.log_text.see("end")
 
+    def run_tracked(self, name: str, fn, *args, **kwargs):
+        """
+        fn z metrykami SQL (app/db/metrics.py): podsumowanie trafia do logu i do SQL_METRICS_PATH.
+        """
+        with track_run(name, on_summary=self.log):
+            return fn(*args, **kwargs)
+
     def _load_eu_countries(self):
         labels = [f"{EU_COUNTRIES[c]} ({c})" for c in EU_COUNTRY_CODES]
         labels.sort()
@@ -154,34 +173,44 @@ class App(tk.Tk):
         try:
             engine = get_engine()
             with engine.connect() as conn:
-                v = conn.execute(text("SELECT VERSION()")).scalar()
+                v = server_version(conn)
             self.log(f"DB OK: {v}")
             self.refresh_stats()
         except Exception as e:
             messagebox.showerror("DB error", str(e))
 
-    def refresh_stats(self):
-        try:
-            engine = get_engine()
-            with engine.connect() as conn:
-                airports = conn.execute(text("SELECT COUNT(*) FROM airports")).scalar()
-                wh = conn.execute(text("SELECT COUNT(*) FROM weather_hourly")).scalar()
-                wr = conn.execute(text("SELECT COUNT(*) FROM weather_risk_daily")).scalar()
-                flights = conn.execute(text("SELECT COUNT(*) FROM flights")).scalar()
-                tickets = conn.execute(text("SELECT COUNT(*) FROM tickets")).scalar()
-                offers = conn.execute(text("SELECT COUNT(*) FROM amadeus_flight_offers")).scalar()
-
-            self.stats_text.delete("1.0", "end")
-            self.stats_text.insert("end", f"airports: {airports}\nweather_hourly: {wh}\nweather_risk_daily: {wr}\n")
-            self.stats_text.insert("end", f"flights: {flights}\ntickets: {tickets}\namadeus_flight_offers: {offers}\n")
-        except Exception as e:
-            self.log(f"STATS ERROR: {e}")
+    def refresh_stats(self, force: bool = True):
+        """
+        Odświeża panel w tle (StatsService). Po akcjach ETL: świeże szacunki;
+        przycisk "Odśwież" korzysta z cache (TTL), "Dokładne" liczy COUNT(*).
+        """
+        exact = bool(self.stats_exact_var.get())
+        if not force:
+            hit = self.stats.cached(exact)
+            if hit is not None:
+                self._show_stats(hit, exact, None)
+                return
+        self.stats.refresh_async(
+            lambda counts, ex, err: self.after(0, self._show_stats, counts, ex, err),
+            exact=exact, force=force,
+        )
+
+    def _show_stats(self, counts: dict, exact: bool, err):
+        if err is not None:
+            self.log(f"STATS ERROR: {err}")
+            return
+        prefix = "" if exact else "~"
+        self.stats_text.delete("1.0", "end")
+        for table, cnt in counts.items():
+            self.stats_text.insert("end", f"{table}: {prefix}{cnt}\n")
+        if not exact:
+            self.stats_text.insert("end", "\n(~ szacunek z information_schema)\n")
 
     def import_airports(self):
         def job():
             try:
                 self.log("Import airports (UE) ...")
-                msg = etl_import_airports()
+                msg = self.run_tracked("import_airports", etl_import_airports)
                 self.log(msg)
                 self.refresh_stats()
             except Exception as e:
@@ -196,7 +225,10 @@ class App(tk.Tk):
         def job():
             try:
                 self.log(f"Weather ETL: {cc} {start}..{end}")
-                msg = etl_weather(cc, start, end)
+                msg = self.run_tracked(
+                    f"weather:{cc}", etl_weather, cc, start, end,
+                    workers=WEATHER_WORKERS, db_workers=WEATHER_DB_WORKERS, batch_size=WEATHER_BATCH_SIZE,
+                )
                 self.log(msg)
                 self.refresh_stats()
             except Exception as e:
@@ -208,7 +240,7 @@ class App(tk.Tk):
         def job():
             try:
                 self.log(f"Build risk: {cc}")
-                self.log(etl_risk(cc))
+                self.log(self.run_tracked(f"risk:{cc}", etl_risk, cc, mode="server"))
                 self.refresh_stats()
             except Exception as e:
                 messagebox.showerror("Risk error", str(e))
@@ -221,7 +253,7 @@ class App(tk.Tk):
         def job():
             try:
                 self.log(f"Generate ops: {cc} {start}..{end}")
-                self.log(etl_ops(cc, start, end, flights_per_day=6))
+                self.log(self.run_tracked(f"ops:{cc}", etl_ops, cc, start, end, flights_per_day=6, bulk=True))
                 self.refresh_stats()
             except Exception as e:
                 messagebox.showerror("Ops error", str(e))
@@ -232,7 +264,7 @@ class App(tk.Tk):
         def job():
             try:
                 self.log(f"Apply impact: {cc}")
-                self.log(etl_impact(cc))
+                self.log(self.run_tracked(f"impact:{cc}", etl_impact, cc, mode="set"))
                 self.refresh_stats()
             except Exception as e:
                 messagebox.showerror("Impact error", str(e))
@@ -258,18 +290,10 @@ class App(tk.Tk):
         def job():
             try:
                 self.log(f"Offers ETL: {origin_cc}->{dest_cc} dates={len(dates)} routes={len(origins)*len(dests)}")
-                fb = 0
-                ok = 0
-                for d in dates:
-                    for o in origins:
-                        for ds in dests:
-                            msg = etl_offers(o, ds, d, adults=1, fallback_n=10)
-                            self.log(msg)
-                            if msg.startswith("OK:"):
-                                ok += 1
-                            elif msg.startswith("FALLBACK:"):
-                                fb += 1
-                self.log(f"Offers done: ok={ok}, fallback={fb}")
+                self.log(self.run_tracked(
+                    f"offers:{origin_cc}-{dest_cc}", etl_offers_matrix,
+                    dates, origins, dests, adults=1, fallback_n=10, on_result=self.log,
+                ))
                 self.refresh_stats()
             except Exception as e:
                 messagebox.showerror("Offers error", str(e))
@@ -285,15 +309,26 @@ class App(tk.Tk):
         def job():
             try:
                 self.log(f"Report: {name} {cc}")
-                csv_path, png_path, html_path = fn(cc)
+                csv_path, png_path, html_path = self.run_tracked(f"report:{name}:{cc}", fn, cc)
                 self.report_outputs[name] = {"csv": csv_path, "png": png_path, "html": html_path}
                 if csv_path:
-                    self.show_csv(csv_path)
+                    self.after(0, self.show_csv, csv_path)
                 self.log("OK report")
             except Exception as e:
                 messagebox.showerror("Report error", str(e))
         threading.Thread(target=job, daemon=True).start()
 
+    def generate_all_reports(self):
+        def job():
+            try:
+                self.log("Reports batch: all reports x UE ...")
+                index = rep_batch(on_result=self.log)
+                self.log(f"OK reports batch: {index}")
+                webbrowser.open(Path(index).resolve().as_uri())
+            except Exception as e:
+                messagebox.showerror("Report error", str(e))
+        threading.Thread(target=job, daemon=True).start()
+
     def open_report(self, kind: str):
         name = self.report_var.get()
         paths = self.report_outputs.get(name, {})
@@ -310,25 +345,9 @@ class App(tk.Tk):
         else:
             os.startfile(P.resolve())  # type: ignore[attr-defined]
 
-    def show_csv(self, path: str, max_rows: int = 200):
-        p = Path(path)
-        if not p.exists():
-            return
-        self.table.delete(*self.table.get_children())
-
-        with p.open("r", encoding="utf-8", newline="") as f:
-            reader = csv.reader(f)
-            header = next(reader, None)
-            if not header:
-                return
-            self.table["columns"] = header
-            for h in header:
-                self.table.heading(h, text=h)
-                self.table.column(h, width=130, stretch=True)
-            for i, row in enumerate(reader):
-                if i >= max_rows:
-                    break
-                self.table.insert("", "end", values=row)
+    def show_csv(self, path: str):
+        if Path(path).exists():
+            self.preview.load(path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,15 @@
+USE airline_final;
+
+-- Znacznik zmiany wiersza pogody: ON UPDATE zmienia się tylko przy realnej zmianie wartości
+ALTER TABLE weather_hourly
+  ADD COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  ADD INDEX idx_weather_updated (iata_code, source, updated_at);
+
+-- High-water mark przyrostowego przeliczania weather_risk_daily (per lotnisko/źródło)
+CREATE TABLE IF NOT EXISTS weather_risk_watermark (
+  iata_code CHAR(3) NOT NULL,
+  source ENUM('historical','forecast') NOT NULL,
+  last_updated_at DATETIME NOT NULL,
+  PRIMARY KEY (iata_code, source),
+  FOREIGN KEY (iata_code) REFERENCES airports(iata_code)
+);
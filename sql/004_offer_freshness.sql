@@ -0,0 +1,7 @@
+USE airline_final;
+
+-- Kiedy ostatnio odpowiedziano na zapytanie (created_at = tylko pierwsze wstawienie)
+ALTER TABLE amadeus_offer_requests
+  ADD COLUMN fetched_at DATETIME NULL;
+
+UPDATE amadeus_offer_requests SET fetched_at = created_at WHERE fetched_at IS NULL;
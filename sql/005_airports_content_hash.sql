@@ -0,0 +1,5 @@
+USE airline_final;
+
+-- Skrót treści wiersza z OurAirports - import pomija wiersze bez zmian
+ALTER TABLE airports
+  ADD COLUMN content_hash CHAR(40) NULL;
@@ -0,0 +1,49 @@
+USE airline_final;
+
+-- Agregaty pod raporty "Operacje vs ryzyko" i "Ceny vs ryzyko".
+-- Utrzymywane przyrostowo przez ETL (app/etl/report_aggregates.py) per kraj/dzień.
+CREATE TABLE IF NOT EXISTS agg_ops_risk_daily (
+  country_code CHAR(2) NOT NULL,
+  day DATE NOT NULL,
+  risk_level ENUM('LOW','MEDIUM','HIGH') NOT NULL,
+  status ENUM('scheduled','delayed','cancelled','completed') NOT NULL,
+  flights_cnt INT NOT NULL,
+  PRIMARY KEY (country_code, day, risk_level, status)
+);
+
+CREATE TABLE IF NOT EXISTS agg_offers_risk_daily (
+  country_code CHAR(2) NOT NULL,
+  day DATE NOT NULL,
+  risk_level ENUM('LOW','MEDIUM','HIGH') NOT NULL,
+  source ENUM('amadeus','synthetic') NOT NULL,
+  offers_cnt INT NOT NULL,
+  price_sum DECIMAL(14,2) NOT NULL,
+  PRIMARY KEY (country_code, day, risk_level, source)
+);
+
+ALTER TABLE amadeus_offer_requests
+  ADD INDEX idx_aor_depart_date (depart_date);
+
+-- Jednorazowe wypełnienie z istniejących danych
+INSERT INTO agg_ops_risk_daily (country_code, day, risk_level, status, flights_cnt)
+SELECT a.country_code, DATE(f.sched_dep), COALESCE(r.risk_level,'LOW'), f.status, COUNT(*)
+FROM flights f
+JOIN airports a ON a.iata_code=f.dep_iata
+LEFT JOIN weather_risk_daily r
+  ON r.iata_code=f.dep_iata
+ AND r.day=DATE(f.sched_dep)
+ AND r.source='forecast'
+WHERE a.country_code IS NOT NULL
+GROUP BY a.country_code, DATE(f.sched_dep), COALESCE(r.risk_level,'LOW'), f.status;
+
+INSERT INTO agg_offers_risk_daily (country_code, day, risk_level, source, offers_cnt, price_sum)
+SELECT a.country_code, req.depart_date, COALESCE(r.risk_level,'LOW'), o.source, COUNT(*), SUM(o.price_total)
+FROM amadeus_flight_offers o
+JOIN amadeus_offer_requests req ON req.request_id = o.request_id
+JOIN airports a ON a.iata_code = req.origin_iata
+LEFT JOIN weather_risk_daily r
+  ON r.iata_code = req.origin_iata
+ AND r.day = req.depart_date
+ AND r.source = 'forecast'
+WHERE a.country_code IS NOT NULL
+GROUP BY a.country_code, req.depart_date, COALESCE(r.risk_level,'LOW'), o.source;
@@ -0,0 +1,8 @@
+USE airline_final;
+
+-- Licznik wersji danych per tabela - podbijany przez ETL, czytany przez cache raportów
+CREATE TABLE IF NOT EXISTS etl_data_version (
+  table_name VARCHAR(64) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -0,0 +1,20 @@
+USE airline_final;
+
+-- Kolumny dnia jako STORED generated columns: złączenia/grupowania po dniu
+-- nie liczą DATE(...) per wiersz i mogą iść po indeksie (zapytania "sargable").
+
+-- weather_hourly.day + indeks pokrywający scoring ryzyka
+-- (GROUP BY iata/source/day czyta tylko indeks, bez sięgania do wierszy)
+ALTER TABLE weather_hourly
+  ADD COLUMN day DATE AS (DATE(dt_utc)) STORED,
+  ADD INDEX idx_weather_day_score (iata_code, source, day, windspeed_ms, precipitation_mm, visibility_m);
+
+-- flights.dep_day: filtr zakresu dni (agregaty raportów) i loty 'scheduled' (impact)
+ALTER TABLE flights
+  ADD COLUMN dep_day DATE AS (DATE(sched_dep)) STORED,
+  ADD INDEX idx_flights_dep_status_day (dep_iata, status, dep_day),
+  ADD INDEX idx_flights_dep_day_status (dep_iata, dep_day, status);
+
+-- LEFT JOIN weather_risk_daily po (iata, source='forecast', day) pokryty indeksem razem z risk_level
+ALTER TABLE weather_risk_daily
+  ADD INDEX idx_risk_lookup (iata_code, source, day, risk_level);
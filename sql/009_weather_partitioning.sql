@@ -0,0 +1,64 @@
+USE airline_final;
+
+-- weather_hourly partycjonowane miesięcznie po dt_utc.
+-- Partycjonowanie wymaga, by każdy klucz unikalny zawierał dt_utc, a InnoDB nie
+-- obsługuje kluczy obcych w tabelach partycjonowanych - stąd:
+--   * zastępczy id usunięty, naturalny klucz (iata_code, dt_utc, source) jako PK,
+--   * FK do airports usunięty (ETL i tak zapisuje tylko lotniska z tabeli airports),
+--   * idx_weather_iata_day (prefiks PK) i idx_weather_source (niska selektywność) usunięte.
+ALTER TABLE weather_hourly DROP FOREIGN KEY weather_hourly_ibfk_1;
+
+ALTER TABLE weather_hourly
+  DROP COLUMN id,
+  DROP INDEX uq_weather,
+  DROP INDEX idx_weather_iata_day,
+  DROP INDEX idx_weather_source,
+  ADD PRIMARY KEY (iata_code, dt_utc, source);
+
+-- pYYYYMM = dane z miesiąca YYYY-MM; pmax jest dzielona na kolejne miesiące
+-- przez app/etl/weather_retention.py (ensure_partitions)
+ALTER TABLE weather_hourly
+PARTITION BY RANGE (TO_DAYS(dt_utc)) (
+  PARTITION p_hist VALUES LESS THAN (TO_DAYS('2025-01-01')),
+  PARTITION p202501 VALUES LESS THAN (TO_DAYS('2025-02-01')),
+  PARTITION p202502 VALUES LESS THAN (TO_DAYS('2025-03-01')),
+  PARTITION p202503 VALUES LESS THAN (TO_DAYS('2025-04-01')),
+  PARTITION p202504 VALUES LESS THAN (TO_DAYS('2025-05-01')),
+  PARTITION p202505 VALUES LESS THAN (TO_DAYS('2025-06-01')),
+  PARTITION p202506 VALUES LESS THAN (TO_DAYS('2025-07-01')),
+  PARTITION p202507 VALUES LESS THAN (TO_DAYS('2025-08-01')),
+  PARTITION p202508 VALUES LESS THAN (TO_DAYS('2025-09-01')),
+  PARTITION p202509 VALUES LESS THAN (TO_DAYS('2025-10-01')),
+  PARTITION p202510 VALUES LESS THAN (TO_DAYS('2025-11-01')),
+  PARTITION p202511 VALUES LESS THAN (TO_DAYS('2025-12-01')),
+  PARTITION p202512 VALUES LESS THAN (TO_DAYS('2026-01-01')),
+  PARTITION p202601 VALUES LESS THAN (TO_DAYS('2026-02-01')),
+  PARTITION p202602 VALUES LESS THAN (TO_DAYS('2026-03-01')),
+  PARTITION p202603 VALUES LESS THAN (TO_DAYS('2026-04-01')),
+  PARTITION p202604 VALUES LESS THAN (TO_DAYS('2026-05-01')),
+  PARTITION p202605 VALUES LESS THAN (TO_DAYS('2026-06-01')),
+  PARTITION p202606 VALUES LESS THAN (TO_DAYS('2026-07-01')),
+  PARTITION p202607 VALUES LESS THAN (TO_DAYS('2026-08-01')),
+  PARTITION p202608 VALUES LESS THAN (TO_DAYS('2026-09-01')),
+  PARTITION p202609 VALUES LESS THAN (TO_DAYS('2026-10-01')),
+  PARTITION p202610 VALUES LESS THAN (TO_DAYS('2026-11-01')),
+  PARTITION p202611 VALUES LESS THAN (TO_DAYS('2026-12-01')),
+  PARTITION p202612 VALUES LESS THAN (TO_DAYS('2027-01-01')),
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- Dzienne agregaty pogody - zostają po usunięciu partycji godzinowych
+CREATE TABLE IF NOT EXISTS weather_daily (
+  iata_code CHAR(3) NOT NULL,
+  day DATE NOT NULL,
+  source ENUM('historical','forecast') NOT NULL,
+  hours_cnt SMALLINT NOT NULL,
+  temp_min_c DOUBLE NULL,
+  temp_avg_c DOUBLE NULL,
+  temp_max_c DOUBLE NULL,
+  wind_avg_ms DOUBLE NULL,
+  wind_max_ms DOUBLE NULL,
+  precip_sum_mm DOUBLE NULL,
+  vis_min_m DOUBLE NULL,
+  PRIMARY KEY (iata_code, day, source)
+);
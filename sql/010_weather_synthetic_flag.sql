@@ -0,0 +1,10 @@
+USE airline_final;
+
+-- Pochodzenie danych pogodowych: source mówi tylko historical/forecast (wg dnia),
+-- a godziny z fallbacku syntetycznego (błąd Open-Meteo) trzeba odróżnić od prawdziwych.
+ALTER TABLE weather_hourly
+  ADD COLUMN is_synthetic TINYINT(1) NOT NULL DEFAULT 0;
+
+-- po retencji: ile godzin dnia pochodziło z generatora
+ALTER TABLE weather_daily
+  ADD COLUMN synthetic_hours SMALLINT NOT NULL DEFAULT 0 AFTER hours_cnt;
@@ -0,0 +1,190 @@
+-- Schemat dla DB_BACKEND=sqlite: stan końcowy migracji 002-010 w składni SQLite.
+-- Wykonywany przez app/db/connection.py, gdy plik bazy nie ma jeszcze tabel.
+-- ENUM -> TEXT + CHECK, AUTO_INCREMENT -> INTEGER PRIMARY KEY AUTOINCREMENT,
+-- ON UPDATE CURRENT_TIMESTAMP -> trigger, brak partycji (retencja przez DELETE).
+
+CREATE TABLE IF NOT EXISTS airports (
+  iata_code CHAR(3) PRIMARY KEY,
+  name VARCHAR(200) NULL,
+  country_code CHAR(2) NOT NULL,
+  latitude DOUBLE NULL,
+  longitude DOUBLE NULL,
+  is_active TINYINT NOT NULL DEFAULT 1,
+  source VARCHAR(50) NOT NULL DEFAULT 'ourairports',
+  content_hash CHAR(40) NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_airports_country ON airports(country_code);
+
+CREATE TABLE IF NOT EXISTS weather_hourly (
+  iata_code CHAR(3) NOT NULL,
+  dt_utc DATETIME NOT NULL,
+  source TEXT NOT NULL CHECK (source IN ('historical','forecast')),
+  temperature_c DOUBLE NULL,
+  windspeed_ms DOUBLE NULL,
+  precipitation_mm DOUBLE NULL,
+  visibility_m DOUBLE NULL,
+  is_synthetic TINYINT NOT NULL DEFAULT 0,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  day DATE AS (DATE(dt_utc)) STORED,
+  PRIMARY KEY (iata_code, dt_utc, source)
+);
+
+CREATE INDEX IF NOT EXISTS idx_weather_updated ON weather_hourly(iata_code, source, updated_at);
+CREATE INDEX IF NOT EXISTS idx_weather_day_score
+  ON weather_hourly(iata_code, source, day, windspeed_ms, precipitation_mm, visibility_m);
+
+-- jak ON UPDATE CURRENT_TIMESTAMP w MySQL: tylko przy realnej zmianie wartości
+CREATE TRIGGER IF NOT EXISTS trg_weather_hourly_updated
+AFTER UPDATE OF temperature_c, windspeed_ms, precipitation_mm, visibility_m ON weather_hourly
+WHEN OLD.temperature_c IS NOT NEW.temperature_c
+  OR OLD.windspeed_ms IS NOT NEW.windspeed_ms
+  OR OLD.precipitation_mm IS NOT NEW.precipitation_mm
+  OR OLD.visibility_m IS NOT NEW.visibility_m
+BEGIN
+  UPDATE weather_hourly SET updated_at = CURRENT_TIMESTAMP
+  WHERE iata_code = NEW.iata_code AND dt_utc = NEW.dt_utc AND source = NEW.source;
+END;
+
+CREATE TABLE IF NOT EXISTS weather_daily (
+  iata_code CHAR(3) NOT NULL,
+  day DATE NOT NULL,
+  source TEXT NOT NULL CHECK (source IN ('historical','forecast')),
+  hours_cnt SMALLINT NOT NULL,
+  synthetic_hours SMALLINT NOT NULL DEFAULT 0,
+  temp_min_c DOUBLE NULL,
+  temp_avg_c DOUBLE NULL,
+  temp_max_c DOUBLE NULL,
+  wind_avg_ms DOUBLE NULL,
+  wind_max_ms DOUBLE NULL,
+  precip_sum_mm DOUBLE NULL,
+  vis_min_m DOUBLE NULL,
+  PRIMARY KEY (iata_code, day, source)
+);
+
+CREATE TABLE IF NOT EXISTS weather_risk_daily (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  iata_code CHAR(3) NOT NULL REFERENCES airports(iata_code),
+  day DATE NOT NULL,
+  source TEXT NOT NULL CHECK (source IN ('historical','forecast')),
+  risk_score DOUBLE NOT NULL,
+  risk_level TEXT NOT NULL CHECK (risk_level IN ('LOW','MEDIUM','HIGH')),
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE (iata_code, day, source)
+);
+
+CREATE INDEX IF NOT EXISTS idx_risk_country_day ON weather_risk_daily(day, source);
+CREATE INDEX IF NOT EXISTS idx_risk_lookup ON weather_risk_daily(iata_code, source, day, risk_level);
+
+CREATE TABLE IF NOT EXISTS weather_risk_watermark (
+  iata_code CHAR(3) NOT NULL REFERENCES airports(iata_code),
+  source TEXT NOT NULL CHECK (source IN ('historical','forecast')),
+  last_updated_at DATETIME NOT NULL,
+  PRIMARY KEY (iata_code, source)
+);
+
+CREATE TABLE IF NOT EXISTS flights (
+  flight_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  dep_iata CHAR(3) NOT NULL REFERENCES airports(iata_code),
+  arr_iata CHAR(3) NOT NULL REFERENCES airports(iata_code),
+  sched_dep DATETIME NOT NULL,
+  sched_arr DATETIME NOT NULL,
+  status TEXT NOT NULL DEFAULT 'scheduled' CHECK (status IN ('scheduled','delayed','cancelled','completed')),
+  delay_min INT NOT NULL DEFAULT 0,
+  seats INT NOT NULL DEFAULT 180,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  dep_day DATE AS (DATE(sched_dep)) STORED
+);
+
+CREATE INDEX IF NOT EXISTS idx_flights_dep_day ON flights(dep_iata, sched_dep);
+CREATE INDEX IF NOT EXISTS idx_flights_dep_status_day ON flights(dep_iata, status, dep_day);
+CREATE INDEX IF NOT EXISTS idx_flights_dep_day_status ON flights(dep_iata, dep_day, status);
+
+CREATE TABLE IF NOT EXISTS passengers (
+  passenger_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  first_name VARCHAR(60) NOT NULL,
+  last_name VARCHAR(60) NOT NULL,
+  nationality CHAR(2) NULL,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS bookings (
+  booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tickets (
+  ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  booking_id BIGINT NOT NULL REFERENCES bookings(booking_id),
+  passenger_id BIGINT NOT NULL REFERENCES passengers(passenger_id),
+  flight_id BIGINT NOT NULL REFERENCES flights(flight_id),
+  price_eur DECIMAL(10,2) NOT NULL,
+  cabin TEXT NOT NULL DEFAULT 'ECONOMY' CHECK (cabin IN ('ECONOMY','BUSINESS')),
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_tickets_flight ON tickets(flight_id);
+
+CREATE TABLE IF NOT EXISTS amadeus_offer_requests (
+  request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  origin_iata CHAR(3) NOT NULL REFERENCES airports(iata_code) ON UPDATE CASCADE ON DELETE RESTRICT,
+  dest_iata CHAR(3) NOT NULL REFERENCES airports(iata_code) ON UPDATE CASCADE ON DELETE RESTRICT,
+  depart_date DATE NOT NULL,
+  adults INT NOT NULL DEFAULT 1,
+  status TEXT NOT NULL CHECK (status IN ('ok','fallback','invalid_input')),
+  offers_cnt INT NOT NULL DEFAULT 0,
+  error_msg VARCHAR(400) NULL,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  fetched_at DATETIME NULL,
+  UNIQUE (origin_iata, dest_iata, depart_date, adults)
+);
+
+CREATE INDEX IF NOT EXISTS idx_aor_origin ON amadeus_offer_requests(origin_iata);
+CREATE INDEX IF NOT EXISTS idx_aor_destination ON amadeus_offer_requests(dest_iata);
+CREATE INDEX IF NOT EXISTS idx_aor_depart_date ON amadeus_offer_requests(depart_date);
+
+CREATE TABLE IF NOT EXISTS amadeus_flight_offers (
+  offer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  request_id BIGINT NOT NULL REFERENCES amadeus_offer_requests(request_id),
+  source TEXT NOT NULL CHECK (source IN ('amadeus','synthetic')),
+  price_total DECIMAL(10,2) NOT NULL,
+  currency CHAR(3) NOT NULL DEFAULT 'EUR',
+  stops INT NOT NULL,
+  duration_min INT NOT NULL,
+  carrier_code VARCHAR(3) NULL,
+  fetched_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_offers_req ON amadeus_flight_offers(request_id);
+
+CREATE TABLE IF NOT EXISTS agg_ops_risk_daily (
+  country_code CHAR(2) NOT NULL,
+  day DATE NOT NULL,
+  risk_level TEXT NOT NULL CHECK (risk_level IN ('LOW','MEDIUM','HIGH')),
+  status TEXT NOT NULL CHECK (status IN ('scheduled','delayed','cancelled','completed')),
+  flights_cnt INT NOT NULL,
+  PRIMARY KEY (country_code, day, risk_level, status)
+);
+
+CREATE TABLE IF NOT EXISTS agg_offers_risk_daily (
+  country_code CHAR(2) NOT NULL,
+  day DATE NOT NULL,
+  risk_level TEXT NOT NULL CHECK (risk_level IN ('LOW','MEDIUM','HIGH')),
+  source TEXT NOT NULL CHECK (source IN ('amadeus','synthetic')),
+  offers_cnt INT NOT NULL,
+  price_sum DECIMAL(14,2) NOT NULL,
+  PRIMARY KEY (country_code, day, risk_level, source)
+);
+
+CREATE TABLE IF NOT EXISTS etl_data_version (
+  table_name VARCHAR(64) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_etl_data_version_updated
+AFTER UPDATE OF version ON etl_data_version
+BEGIN
+  UPDATE etl_data_version SET updated_at = CURRENT_TIMESTAMP WHERE table_name = NEW.table_name;
+END;